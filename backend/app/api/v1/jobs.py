@@ -9,8 +9,9 @@ from ...crud import (
     delete_job,
     delete_jobs,
     get_jobs_assigned_to_email,
+    get_job_stats,
 )
-from ...schemas import Job, JobCreate, JobUpdate, JobDeleteRequest
+from ...schemas import Job, JobCreate, JobUpdate, JobDeleteRequest, JobStats
 from ...dependencies import get_db, require_admin, get_current_user_from_token
 from ...models import UserRole
 
@@ -41,6 +42,12 @@ def read_job(job_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Job not found")
     return db_job
 
+@router.get("/{job_id}/stats", response_model=JobStats)
+def read_job_stats(job_id: int, db: Session = Depends(get_db), admin=Depends(require_admin)):
+    if get_job(db, job_id=job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return get_job_stats(db, job_id)
+
 @router.put("/{job_id}", response_model=Job)
 def update_existing_job(job_id: int, job_update: JobUpdate, db: Session = Depends(get_db), admin=Depends(require_admin)):
     updated_job = update_job(db, job_id=job_id, job_update=job_update)
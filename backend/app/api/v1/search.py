@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from ...crud import get_jobs_assigned_to_email, user_can_access_job
+from ...schemas import SearchResponse
+from ...search import search_documents
+from ...dependencies import get_db, get_current_user_from_token
+from ...models import UserRole
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResponse)
+def search(
+    q: Optional[str] = None,
+    job_id: Optional[int] = None,
+    where: List[str] = Query([], description="Field filters as field:op:value, op in eq, contains, gt, gte, lt, lte"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_from_token),
+):
+    if job_id is not None:
+        if not user_can_access_job(db, current_user, job_id):
+            raise HTTPException(status_code=404, detail="Job not found")
+        job_ids = [job_id]
+    elif current_user.role == UserRole.ADMIN:
+        job_ids = None
+    else:
+        job_ids = [job.id for job in get_jobs_assigned_to_email(db, current_user.email)]
+
+    try:
+        return search_documents(db, q=q, job_ids=job_ids, filters=where, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
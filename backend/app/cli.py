@@ -0,0 +1,71 @@
+"""Maintenance commands.
+
+    python -m app.cli init-db
+    python -m app.cli prune-task-logs [--retention-days N] [--compact-after-days N]
+    python -m app.cli rebuild-job-stats [--job-id N]
+    python -m app.cli reindex-search [--job-id N]
+"""
+import argparse
+
+from .core.database import engine, init_db
+
+
+def cmd_init_db(args):
+    from .retention import ensure_indexes
+    init_db()
+    # Slow on a large existing task_logs table, so not done at API startup
+    ensure_indexes(engine)
+    print("Database initialized")
+
+
+def cmd_prune_task_logs(args):
+    from .retention import run_retention
+    summary = run_retention(engine, args.retention_days, args.compact_after_days)
+    print(", ".join(f"{k}={v}" for k, v in summary.items()))
+
+
+def cmd_rebuild_job_stats(args):
+    from .core.database import SessionLocal
+    from .crud import rebuild_job_stats
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt stats for {rebuild_job_stats(db, args.job_id)} job(s)")
+    finally:
+        db.close()
+
+
+def cmd_reindex_search(args):
+    from .core.database import SessionLocal
+    from .search import reindex
+    db = SessionLocal()
+    try:
+        print(f"Reindexed {reindex(db, args.job_id)} result(s)")
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init-db", help="create tables, indexes and partitions").set_defaults(func=cmd_init_db)
+
+    prune = commands.add_parser("prune-task-logs", help="apply TaskLog retention and compaction")
+    prune.add_argument("--retention-days", type=int)
+    prune.add_argument("--compact-after-days", type=int)
+    prune.set_defaults(func=cmd_prune_task_logs)
+
+    rebuild = commands.add_parser("rebuild-job-stats", help="recompute per-job stats from results")
+    rebuild.add_argument("--job-id", type=int)
+    rebuild.set_defaults(func=cmd_rebuild_job_stats)
+
+    reindex = commands.add_parser("reindex-search", help="rebuild search field rows and full-text entries")
+    reindex.add_argument("--job-id", type=int)
+    reindex.set_defaults(func=cmd_reindex_search)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
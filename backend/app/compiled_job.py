@@ -0,0 +1,223 @@
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .response_parser import FieldMatcher
+
+# Placeholders a job prompt may reference
+PROMPT_PLACEHOLDERS = ("text", "fields")
+
+MISSING_VALUE = "Missing or empty value"
+
+# Legacy date check: anything starting with YYYY-MM-DD
+_DEFAULT_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Follow-up prompt for re-extracting only the fields that failed validation
+REEXTRACT_PROMPT = (
+    "These fields extracted from the document below are missing or invalid:\n"
+    "{problems}\n\n"
+    "Field definitions: {fields}\n"
+    "Re-read the document and return only a JSON object with exactly these keys.\n\n"
+    "Document text:\n{text}"
+)
+
+Check = Callable[[Any], Optional[str]]
+
+
+class PromptTemplate:
+    """Job prompt split once into literal chunks and placeholders."""
+
+    def __init__(self, template: str):
+        # (literal, placeholder name or None, format string for !conv / :spec or None)
+        self.parts: List[Tuple[str, Optional[str], Optional[str]]] = []
+        for literal, name, format_spec, conversion in Formatter().parse(template):
+            if name is not None and name not in PROMPT_PLACEHOLDERS:
+                raise ValueError(f"Invalid prompt template: missing placeholder '{name}'")
+            fmt = None
+            if format_spec or conversion:
+                fmt = "{0" + (f"!{conversion}" if conversion else "") + (f":{format_spec}" if format_spec else "") + "}"
+            self.parts.append((literal, name, fmt))
+
+    def render(self, **values: str) -> str:
+        out = []
+        for literal, name, fmt in self.parts:
+            out.append(literal)
+            if name is not None:
+                value = values[name]
+                out.append(fmt.format(value) if fmt else value)
+        return "".join(out)
+
+
+def _check_int(value: Any) -> Optional[str]:
+    try:
+        int(value)
+    except (ValueError, TypeError):
+        return "Must be a valid integer"
+    return None
+
+
+def _check_float(value: Any) -> Optional[str]:
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return "Must be a valid number"
+    if math.isnan(number) or math.isinf(number):
+        return "Must be a valid number"
+    return None
+
+
+def _check_decimal(value: Any) -> Optional[str]:
+    try:
+        number = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return "Must be a valid decimal"
+    if not number.is_finite():
+        return "Must be a valid decimal"
+    return None
+
+
+def _date_check(spec: Dict) -> Check:
+    formats = spec.get("formats") or ([spec["format"]] if spec.get("format") else [])
+    if not formats:
+        def check(value: Any) -> Optional[str]:
+            if not _DEFAULT_DATE_RE.match(str(value)):
+                return "Invalid date format"
+            return None
+        return check
+
+    def check(value: Any) -> Optional[str]:
+        text = str(value).strip()
+        for fmt in formats:
+            try:
+                datetime.strptime(text, fmt)
+                return None
+            except ValueError:
+                continue
+        return "Invalid date format"
+    return check
+
+
+def _enum_check(spec: Dict) -> Check:
+    choices = spec.get("values") or spec.get("choices") or []
+    if spec.get("case_sensitive"):
+        allowed = {str(c) for c in choices}
+        normalize = str
+    else:
+        allowed = {str(c).casefold() for c in choices}
+        normalize = lambda v: str(v).casefold()  # noqa: E731
+    message = "Must be one of: " + ", ".join(str(c) for c in choices)
+
+    def check(value: Any) -> Optional[str]:
+        return None if normalize(value).strip() in allowed else message
+    return check
+
+
+def _regex_check(spec: Dict) -> Check:
+    pattern = re.compile(spec.get("pattern", ""), 0 if spec.get("case_sensitive", True) else re.IGNORECASE)
+
+    def check(value: Any) -> Optional[str]:
+        return None if pattern.fullmatch(str(value).strip()) else "Does not match expected pattern"
+    return check
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Dict], Check]] = {
+    "int": lambda spec: _check_int,
+    "float": lambda spec: _check_float,
+    "decimal": lambda spec: _check_decimal,
+    "date": _date_check,
+    "enum": _enum_check,
+    "regex": _regex_check,
+}
+
+
+class FieldValidator:
+    """Job `fields` spec compiled into per-field checks."""
+
+    def __init__(self, fields: Dict[str, Dict]):
+        self.rules: List[Tuple[str, bool, Optional[Check]]] = []
+        for field, spec in fields.items():
+            spec = spec or {}
+            factory = _TYPE_CHECKS.get(spec.get("type"))
+            try:
+                check = factory(spec) if factory else None
+            except re.error as e:
+                raise ValueError(f"Invalid pattern for field '{field}': {e}")
+            self.rules.append((field, bool(spec.get("required")), check))
+
+    def validate(self, extracted: Dict) -> Dict[str, str]:
+        errors = {}
+        for field, required, check in self.rules:
+            value = extracted.get(field)
+
+            if required and (value is None or str(value).strip() == ""):
+                errors[field] = MISSING_VALUE
+
+            if value and check is not None:
+                message = check(value)
+                if message:
+                    errors[field] = message
+        return errors
+
+    def validate_many(self, rows: Iterable[Dict]) -> List[Dict[str, str]]:
+        validate = self.validate
+        return [validate(row) for row in rows]
+
+
+class CompiledJob:
+    """Everything a worker needs from a Job, prepared once per job version."""
+
+    def __init__(self, job_id: int, version: Any, prompt: str, fields: Dict[str, Dict]):
+        self.job_id = job_id
+        self.version = version
+        self.fields = fields
+        self.fields_json = json.dumps(fields, ensure_ascii=False)
+        self.template = PromptTemplate(prompt)
+        self.validator = FieldValidator(fields)
+        self.matcher = FieldMatcher(fields.keys())
+
+    def render_prompt(self, text: str) -> str:
+        return self.template.render(text=text, fields=self.fields_json)
+
+    def render_reextract_prompt(self, text: str, failed: Dict[str, str], previous: Dict[str, Any]) -> str:
+        """Narrow follow-up prompt asking only for the `failed` fields ({field: error})."""
+        problems = "\n".join(
+            f"- {field}: got {json.dumps(previous.get(field), ensure_ascii=False, default=str)} ({message})"
+            for field, message in failed.items()
+        )
+        fields = json.dumps({f: self.fields.get(f, {}) for f in failed}, ensure_ascii=False)
+        return REEXTRACT_PROMPT.format(problems=problems, fields=fields, text=text)
+
+
+_cache: "OrderedDict[int, CompiledJob]" = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 256
+
+
+def get_compiled_job(job) -> CompiledJob:
+    """Return the cached CompiledJob for `job`, rebuilding it when the job was edited."""
+    # updated_at is NULL until the first edit, and SQLite can reuse a deleted job's id,
+    # so created_at is part of the version too
+    version = (job.created_at, job.updated_at)
+    with _cache_lock:
+        compiled = _cache.get(job.id)
+        if compiled is not None and compiled.version == version:
+            _cache.move_to_end(job.id)
+            return compiled
+
+    compiled = CompiledJob(job.id, version, job.prompt, job.fields)
+    with _cache_lock:
+        _cache[job.id] = compiled
+        _cache.move_to_end(job.id)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def clear_compiled_jobs():
+    with _cache_lock:
+        _cache.clear()
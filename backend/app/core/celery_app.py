@@ -0,0 +1,19 @@
+from celery import Celery
+from .config import settings
+
+# Lightweight client: the API only needs this to enqueue tasks by name.
+# Task modules (and their OCR/LLM dependencies) are imported by workers only.
+celery_app = Celery(
+    'tasks',
+    broker=settings.redis_url,
+    backend=settings.redis_url,
+    include=['app.tasks'],
+)
+
+PROCESS_PDF_TASK = 'app.tasks.process_pdf_task'
+PRUNE_TASK_LOGS_TASK = 'app.tasks.prune_task_logs'
+REEXTRACT_FIELDS_TASK = 'app.tasks.reextract_fields_task'
+
+celery_app.conf.beat_schedule = {
+    'prune-task-logs': {'task': PRUNE_TASK_LOGS_TASK, 'schedule': 24 * 60 * 60},
+}
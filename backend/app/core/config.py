@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -9,7 +10,27 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     upload_dir: str = "./uploads"
+    storage_backend: str = "local"
+    # Hand downloads to nginx (X-Accel-Redirect) instead of streaming them from Python
+    storage_accel_redirect: bool = False
+    storage_accel_prefix: str = "/protected-uploads/"
     tesseract_path: str = r"C:\Program Files\Tesseract-OCR"
+    ocr_backend: str = "pytesseract"  # or "tesserocr" (needs the tesserocr package)
+    ocr_pool_size: int = 1  # tesserocr API handles per worker process; raise it for gevent workers
+    tessdata_path: Optional[str] = None
+    pdf_backend: str = "pypdf2"  # or "pypdfium2" (needs the pypdfium2 package)
+    # Automatic follow-up prompts per result for fields that failed validation; 0 disables
+    reextract_max_attempts: int = 2
+    # Fair-share scheduling, see app/scheduling.py
+    scheduler_enabled: bool = True
+    scheduler_tenant_by: str = "member"  # "member" or "job"
+    scheduler_tenant_concurrency: int = 4
+    scheduler_default_weight: int = 1
+    scheduler_weights: Dict[str, int] = {}  # e.g. {"member:ops@example.com": 3}
+    scheduler_lease_seconds: int = 3600
+    # TaskLog retention, see app/retention.py
+    task_log_retention_days: int = 90
+    task_log_compact_after_days: int = 7
 
     class Config:
         env_file = ".env"
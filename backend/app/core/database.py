@@ -1,6 +1,47 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
 engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Columns added to tables after they were first created; create_all won't add them
+ADDED_COLUMNS = [
+    ("jobs", "extraction_options"),
+    ("pdfs", "content_hash"),
+    ("pdfs", "original_filename"),
+    ("results", "reextract_attempts"),
+]
+
+def ensure_columns(bind):
+    """Add any missing ADDED_COLUMNS to existing tables (idempotent)."""
+    from ..models import Base
+    inspector = inspect(bind)
+    for table_name, column_name in ADDED_COLUMNS:
+        if not inspector.has_table(table_name):
+            continue
+        if column_name in {c["name"] for c in inspector.get_columns(table_name)}:
+            continue
+        column = Base.metadata.tables[table_name].c[column_name]
+        if_not_exists = " IF NOT EXISTS" if bind.dialect.name == "postgresql" else ""
+        ddl = f"ALTER TABLE {table_name} ADD COLUMN{if_not_exists} {column_name} {column.type.compile(dialect=bind.dialect)}"
+        if column.server_default is not None:
+            ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+        with bind.begin() as conn:
+            conn.execute(text(ddl))
+        # The column was just added, so its index can't exist yet
+        for index in column.table.indexes:
+            if column_name in index.columns:
+                index.create(bind, checkfirst=True)
+
+def init_db(bind=None):
+    """Create tables that don't exist yet."""
+    from ..models import Base
+    from ..retention import create_partitioned_table, ensure_partitions
+    bind = bind or engine
+    create_partitioned_table(bind)
+    Base.metadata.create_all(bind=bind)
+    ensure_columns(bind)
+    ensure_partitions(bind)
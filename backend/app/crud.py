@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List, Set
-from .models import User, Job, PDF, Result, TaskLog
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Callable, Dict, List, Optional, Set
+from .models import User, UserRole, Job, PDF, Result, TaskLog, JobStats, JobFieldStats
+from .compiled_job import MISSING_VALUE
 from .schemas import UserCreate, JobCreate, JobUpdate, ResultCreate, PDFUpload
 from .core.security import get_password_hash, verify_password
 
@@ -85,11 +87,13 @@ def update_job(db: Session, job_id: int, job_update: JobUpdate) -> Optional[Job]
 def delete_job(db: Session, job_id: int) -> Optional[Job]:
     db_job = get_job(db, job_id)
     if db_job:
+        _delete_job_stats(db, [job_id])
         db.delete(db_job)
         db.commit()
     return db_job
 
 def delete_jobs(db: Session, job_ids: List[int]) -> int:
+    _delete_job_stats(db, job_ids)
     deleted = db.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
     db.commit()
     return deleted
@@ -114,14 +118,196 @@ def create_pdf(db: Session, pdf: PDFUpload) -> PDF:
     db.refresh(db_pdf)
     return db_pdf
 
-def create_result(db: Session, result: ResultCreate) -> Result:
+def get_pdf(db: Session, pdf_id: int) -> Optional[PDF]:
+    return db.query(PDF).filter(PDF.id == pdf_id).first()
+
+def user_can_access_job(db: Session, user: User, job_id: int) -> bool:
+    if user.role == UserRole.ADMIN:
+        return True
+    job = get_job(db, job_id)
+    return bool(job) and _job_has_email(job, user.email)
+
+def create_result(
+    db: Session,
+    result: ResultCreate,
+    field_errors: Optional[Dict[str, str]] = None,
+    processing_ms: Optional[int] = None,
+) -> Result:
     db_result = Result(**result.dict())
     db.add(db_result)
+    if field_errors is not None:
+        # Same transaction as the result, so stats never drift from results
+        _record_result_stats(db, result.job_id, field_errors, processing_ms)
     db.commit()
     db.refresh(db_result)
     return db_result
 
+def get_result(db: Session, result_id: int) -> Optional[Result]:
+    return db.query(Result).filter(Result.id == result_id).first()
+
+def get_result_ids_with_errors(db: Session, job_id: int, batch_size: int = 1000) -> List[int]:
+    rows = db.query(Result.id, Result.errors).filter(Result.job_id == job_id).order_by(Result.id).yield_per(batch_size)
+    return [result_id for result_id, errors in rows if errors]
+
+def update_result_fields(
+    db: Session,
+    result_id: int,
+    new_values: Dict[str, Any],
+    validate: Callable[[Dict[str, Any]], Dict[str, str]],
+) -> Optional[Result]:
+    """Merge re-extracted values into a result, re-validate it and move the job stats along with it.
+
+    The row is locked first, so concurrent re-extractions of one result are
+    applied one after the other against its current errors.
+    """
+    result = db.query(Result).filter(Result.id == result_id).with_for_update().populate_existing().first()
+    if result is None:
+        return None
+    old_errors = parse_result_errors(result.errors)
+    # Only fields that are still failing; another run may have fixed the rest
+    extracted_fields = dict(result.extracted_fields or {})
+    extracted_fields.update({f: v for f, v in new_values.items() if f in old_errors})
+    field_errors = validate(extracted_fields)
+    _record_field_errors(db, result.job_id, old_errors, sign=-1)
+    _record_field_errors(db, result.job_id, field_errors)
+    _increment(db, JobStats, {"job_id": result.job_id}, {
+        "documents_with_errors": (1 if field_errors else 0) - (1 if old_errors else 0),
+    })
+    result.extracted_fields = extracted_fields
+    result.errors = [f"{field}: {msg}" for field, msg in field_errors.items()]
+    result.reextract_attempts = (result.reextract_attempts or 0) + 1
+    db.commit()
+    db.refresh(result)
+    return result
+
 def create_task_log(db: Session, task_id: str, status: str, message: Optional[str] = None):
     db_log = TaskLog(task_id=task_id, status=status, log_message=message)
     db.add(db_log)
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+def get_task_history(db: Session, task_id: str) -> List[TaskLog]:
+    # Served by ix_task_logs_task_id_timestamp
+    return (
+        db.query(TaskLog)
+        .filter(TaskLog.task_id == task_id)
+        .order_by(TaskLog.timestamp, TaskLog.id)
+        .all()
+    )
+
+
+# === Per-job statistics ===
+
+def _increment(db: Session, model, key: Dict[str, Any], deltas: Dict[str, int]):
+    """Atomically add `deltas` to a counter row, creating the row on first use."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    values = {getattr(model, k): getattr(model, k) + v for k, v in deltas.items()}
+    query = db.query(model).filter_by(**key)
+    if query.update(values, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(model(**key, **deltas))
+    except IntegrityError:
+        # Another worker created it first
+        query.update(values, synchronize_session=False)
+
+
+def _field_error_kind(message: str) -> str:
+    return "missing" if message == MISSING_VALUE else "invalid"
+
+
+def _record_field_errors(db: Session, job_id: int, field_errors: Dict[str, str], sign: int = 1):
+    for field, message in field_errors.items():
+        _increment(db, JobFieldStats, {"job_id": job_id, "field": field}, {_field_error_kind(message): sign})
+
+
+def _record_result_stats(db: Session, job_id: int, field_errors: Dict[str, str], processing_ms: Optional[int]):
+    _increment(db, JobStats, {"job_id": job_id}, {
+        "documents_processed": 1,
+        "documents_with_errors": 1 if field_errors else 0,
+        "timed_documents": 1 if processing_ms is not None else 0,
+        "total_processing_ms": processing_ms or 0,
+    })
+    _record_field_errors(db, job_id, field_errors)
+
+
+def _delete_job_stats(db: Session, job_ids: List[int]):
+    db.query(JobFieldStats).filter(JobFieldStats.job_id.in_(job_ids)).delete(synchronize_session=False)
+    db.query(JobStats).filter(JobStats.job_id.in_(job_ids)).delete(synchronize_session=False)
+
+
+def record_job_failure(db: Session, job_id: int, processing_ms: Optional[int] = None):
+    _increment(db, JobStats, {"job_id": job_id}, {
+        "documents_failed": 1,
+        "timed_documents": 1 if processing_ms is not None else 0,
+        "total_processing_ms": processing_ms or 0,
+    })
+    db.commit()
+
+
+def parse_result_errors(errors: Optional[List[str]]) -> Dict[str, str]:
+    """Turn stored "field: message" strings back into {field: message}."""
+    parsed = {}
+    for entry in errors or []:
+        field, _, message = entry.partition(": ")
+        parsed[field] = message
+    return parsed
+
+
+def get_job_stats(db: Session, job_id: int) -> Dict[str, Any]:
+    stats = db.query(JobStats).filter(JobStats.job_id == job_id).first()
+    field_rows = db.query(JobFieldStats).filter(JobFieldStats.job_id == job_id).all()
+    processed = stats.documents_processed if stats else 0
+    failed = stats.documents_failed if stats else 0
+    attempted = processed + failed
+    return {
+        "job_id": job_id,
+        "documents_processed": processed,
+        "documents_with_errors": stats.documents_with_errors if stats else 0,
+        "documents_failed": failed,
+        "failure_rate": failed / attempted if attempted else 0.0,
+        "avg_processing_ms": (
+            stats.total_processing_ms / stats.timed_documents if stats and stats.timed_documents else None
+        ),
+        "fields": {row.field: {"missing": row.missing, "invalid": row.invalid} for row in field_rows},
+        "updated_at": stats.updated_at if stats else None,
+    }
+
+
+def rebuild_job_stats(db: Session, job_id: Optional[int] = None, batch_size: int = 1000) -> int:
+    """Recompute result-derived counters from the Result table (for backfills).
+
+    Failure and timing counters can't be derived from results and are kept as they are.
+    """
+    job_ids = [job_id] if job_id is not None else [row.id for row in db.query(Job.id).all()]
+    for jid in job_ids:
+        processed = with_errors = 0
+        fields: Dict[str, Dict[str, int]] = {}
+        rows = (
+            db.query(Result.errors)
+            .filter(Result.job_id == jid)
+            .order_by(Result.id)
+            .yield_per(batch_size)
+        )
+        for (errors,) in rows:
+            processed += 1
+            parsed = parse_result_errors(errors)
+            if parsed:
+                with_errors += 1
+            for field, message in parsed.items():
+                counts = fields.setdefault(field, {"missing": 0, "invalid": 0})
+                counts[_field_error_kind(message)] += 1
+
+        db.query(JobFieldStats).filter(JobFieldStats.job_id == jid).delete(synchronize_session=False)
+        stats = db.query(JobStats).filter(JobStats.job_id == jid).first()
+        if stats is None:
+            stats = JobStats(job_id=jid, documents_failed=0, timed_documents=0, total_processing_ms=0)
+            db.add(stats)
+        stats.documents_processed = processed
+        stats.documents_with_errors = with_errors
+        for field, counts in fields.items():
+            db.add(JobFieldStats(job_id=jid, field=field, **counts))
+        db.commit()
+    return len(job_ids)
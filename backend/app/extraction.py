@@ -0,0 +1,181 @@
+import math
+import re
+import unicodedata
+from dataclasses import dataclass, fields as dataclass_fields
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+from .ocr import get_ocr_backend
+from .pdf_backends import POINTS_PER_INCH, PDFDocument, get_pdf_backend
+
+COLOR_MODES = ("color", "gray", "bilevel")
+
+# Text layer quality gates, see text_layer_usable()
+MIN_ALNUM_RATIO = 0.4
+MAX_BAD_CHAR_RATIO = 0.05
+_CID_RE = re.compile(r"\(cid:\d+\)")
+
+
+@dataclass
+class RasterOptions:
+    """How OCR pages are rasterized. Overridable per job via `Job.extraction_options`."""
+
+    # Target pixels per page; DPI is derived from the page's media box
+    pixel_budget: int = 4_000_000  # ~A4 at 200 DPI
+    min_dpi: int = 100
+    max_dpi: int = 300
+    color_mode: str = "gray"
+    bilevel_threshold: int = 160
+    deskew: bool = False
+    crop_margins: bool = False
+    lang: str = "eng"
+
+    @classmethod
+    def from_dict(cls, options: Optional[Dict]) -> "RasterOptions":
+        if not options:
+            return cls()
+        values = {}
+        for f in dataclass_fields(cls):
+            if f.name not in options:
+                continue
+            value = options[f.name]
+            # bool is an int subclass; don't let `true` pass as a pixel budget
+            if not isinstance(value, f.type) or (f.type is int and isinstance(value, bool)):
+                raise ValueError(f"Invalid {f.name} {value!r}, expected {f.type.__name__}")
+            values[f.name] = value
+        raster = cls(**values)
+        if raster.color_mode not in COLOR_MODES:
+            raise ValueError(f"Invalid color_mode '{raster.color_mode}', expected one of {COLOR_MODES}")
+        if raster.pixel_budget <= 0:
+            raise ValueError("pixel_budget must be positive")
+        if raster.min_dpi <= 0 or raster.max_dpi < raster.min_dpi:
+            raise ValueError("Invalid DPI range")
+        if not 0 <= raster.bilevel_threshold <= 255:
+            raise ValueError("bilevel_threshold must be between 0 and 255")
+        return raster
+
+
+def page_dpi(width_pt: float, height_pt: float, options: RasterOptions) -> int:
+    """Pick the highest DPI that keeps the rendered page within the pixel budget."""
+    area_in = (width_pt / POINTS_PER_INCH) * (height_pt / POINTS_PER_INCH)
+    if area_in <= 0:
+        return options.min_dpi
+    dpi = int(math.sqrt(options.pixel_budget / area_in))
+    return max(options.min_dpi, min(options.max_dpi, dpi))
+
+
+def text_layer_usable(text: str) -> bool:
+    """False when a page's text layer is empty or garbage and the page should be OCR'd.
+
+    Broken font encodings show up as U+FFFD, control/private-use characters,
+    pdfminer-style "(cid:NN)" glyph references, or mostly punctuation.
+    """
+    cids = len(_CID_RE.findall(text))
+    chars = [c for c in _CID_RE.sub("", text) if not c.isspace()]
+    if not chars:
+        return False
+    bad = cids + sum(1 for c in chars if c == "\ufffd" or unicodedata.category(c) in ("Cc", "Co", "Cs"))
+    if bad / (len(chars) + cids) > MAX_BAD_CHAR_RATIO:
+        return False
+    return sum(1 for c in chars if c.isalnum()) / len(chars) >= MIN_ALNUM_RATIO
+
+
+def _crop_margins(image: Image.Image) -> Image.Image:
+    gray = image if image.mode == "L" else image.convert("L")
+    # Ignore faint scan noise when looking for the content box
+    bbox = ImageOps.invert(gray).point(lambda p: 255 if p > 40 else 0).getbbox()
+    if not bbox:
+        return image
+    pad = 10
+    left, top, right, bottom = bbox
+    return image.crop((max(0, left - pad), max(0, top - pad),
+                       min(image.width, right + pad), min(image.height, bottom + pad)))
+
+
+def _deskew(image: Image.Image, max_angle: float = 5.0, step: float = 0.5) -> Image.Image:
+    """Straighten small rotations by maximising the variance of the row ink profile."""
+    gray = image if image.mode == "L" else image.convert("L")
+    thumb = ImageOps.invert(gray)
+    thumb.thumbnail((800, 800))
+
+    def score(angle: float) -> float:
+        rotated = thumb.rotate(angle, resample=Image.BILINEAR, expand=False)
+        # Box-resizing to one column averages each row
+        profile = list(rotated.resize((1, rotated.height), Image.BOX).getdata())
+        mean = sum(profile) / len(profile)
+        return sum((p - mean) ** 2 for p in profile)
+
+    steps = int(max_angle / step)
+    best = max((i * step for i in range(-steps, steps + 1)), key=score)
+    if best == 0:
+        return image
+    fill = 255 if image.mode in ("L", "1") else (255, 255, 255)
+    return image.rotate(best, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+
+
+def rasterize_page(
+    pdf_path: str, page_num: int, dpi: int, options: RasterOptions, document: Optional[PDFDocument] = None
+) -> Optional[Image.Image]:
+    grayscale = options.color_mode != "color"
+    # Backends that can render in-process skip the pdftoppm subprocess
+    image = document.render(page_num, dpi, grayscale) if document is not None else None
+    if image is None:
+        from pdf2image import convert_from_path
+
+        # ppm/pgm output is parsed straight from pdftoppm's stdout
+        images = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            first_page=page_num,
+            last_page=page_num,
+            fmt="ppm",
+            grayscale=grayscale,
+        )
+        if not images:
+            return None
+        image = images[0]
+
+    if options.deskew:
+        image = _deskew(image)
+    if options.crop_margins:
+        image = _crop_margins(image)
+    if options.color_mode == "bilevel":
+        threshold = options.bilevel_threshold
+        image = image.point(lambda p: 255 if p > threshold else 0, mode="1")
+    # Rendered and processed images have no format, and pytesseract writes those to
+    # its temp file as PNG. PPM/PGM/PBM is written uncompressed, which is much cheaper.
+    # pytesseract still writes one temp file per page; only tesserocr skips it.
+    image.format = "PPM"
+    return image
+
+
+def extract_text_from_pdf(pdf_path: str, options: Optional[RasterOptions] = None, backend: Optional[str] = None) -> str:
+    """Extract text from the PDF's text layer, OCR-ing only pages where it is missing or garbage."""
+    options = options or RasterOptions()
+    ocr = None
+    text = ""
+
+    with get_pdf_backend(backend).open(pdf_path) as document:
+        for page_num in range(1, document.page_count + 1):
+            # Try native extraction
+            page_text = document.page_text(page_num)
+            if text_layer_usable(page_text):
+                text += page_text + "\n"
+                continue
+
+            # Fallback: OCR
+            try:
+                ocr = ocr or get_ocr_backend()
+                dpi = page_dpi(*document.page_size(page_num), options)
+                image = rasterize_page(pdf_path, page_num, dpi, options, document)
+                if image is not None:
+                    ocr_text = ocr.image_to_string(image, lang=options.lang, dpi=dpi)
+                    text += ocr_text + "\n"
+            except TimeoutError:
+                # OCR capacity exhausted: fail the task so it retries, don't save a placeholder page
+                raise
+            except Exception as ocr_err:
+                text += f"[OCR failed on page {page_num}: {ocr_err}]\n"
+
+    return text.strip()
@@ -1,28 +1,45 @@
-from fastapi import FastAPI, WebSocket, Depends, UploadFile, File, Form, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, WebSocket, Depends, UploadFile, File, Form, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 import os
+from typing import List
+from urllib.parse import quote
 from sqlalchemy.orm import Session
 from celery.result import AsyncResult
-from .core.database import engine, SessionLocal
-from .models import Base, User, UserRole
-from .api.v1 import auth, jobs, users
+from .core.database import init_db
+from .models import User, UserRole
+from .api.v1 import auth, jobs, search, users
 from .core.config import settings
+from .core.celery_app import celery_app, PROCESS_PDF_TASK, REEXTRACT_FIELDS_TASK
 from .core.websocket_manager import manager
-from .tasks import process_pdf_task
-from .crud import create_pdf, create_task_log
+from .scheduling import BULK, INTERACTIVE, get_scheduler, submit_task, tenant_for
+from .crud import (
+    create_pdf,
+    create_task_log,
+    get_job,
+    get_pdf,
+    get_result,
+    get_result_ids_with_errors,
+    get_task_history,
+    parse_result_errors,
+    user_can_access_job,
+)
+from .storage import get_storage
 from .dependencies import get_db, get_current_user_from_token, require_admin
-from .schemas import PDFUpload
-
-# Create tables if they don't exist (only if database is available)
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    print(f"Warning: Could not connect to database: {e}")
-    print("Database tables will be created when the database is available.")
+from .schemas import PDFUpload, TaskLogEntry
 
 app = FastAPI(title="SaaS App")
 
+# Create tables if they don't exist (only if database is available)
+@app.on_event("startup")
+def create_tables():
+    try:
+        init_db()
+    except Exception as e:
+        print(f"Warning: Could not connect to database: {e}")
+        print("Database tables will be created when the database is available.")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # For development only, replace with specific origins in production
@@ -32,11 +49,10 @@ app.add_middleware(
     expose_headers=["*"]  # This ensures all headers are exposed to the client
 )
 
-app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
-
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
 
 @app.websocket("/ws/{task_id}")
 async def websocket_endpoint(websocket: WebSocket, task_id: str):
@@ -47,6 +63,33 @@ async def websocket_endpoint(websocket: WebSocket, task_id: str):
     except:
         manager.disconnect(task_id)
 
+def enqueue_processing(file_path: str, job_id: int, pdf_id: int, tenant: str, priority: str) -> str:
+    """Queue an uploaded PDF for processing and return its task id."""
+    # Enqueued by name, so the API never imports the OCR/LLM stack
+    return submit_task(PROCESS_PDF_TASK, [file_path, job_id, settings.database_url, pdf_id], tenant, priority)
+
+
+async def save_upload(file: UploadFile, job_id: int, current_user: User, db: Session, priority: str) -> dict:
+    # Content-addressed: identical files are stored once. Hashing and copying
+    # a large PDF is blocking work, so keep it off the event loop.
+    stored = await run_in_threadpool(get_storage().save, file.file)
+    file_path = stored.path
+    
+    pdf = create_pdf(db, PDFUpload(
+        job_id=job_id,
+        file_path=file_path,
+        content_hash=stored.key,
+        original_filename=file.filename,
+    ))
+    
+    # Start Celery task (through the fair-share scheduler)
+    task_id = enqueue_processing(file_path, job_id, pdf.id, tenant_for(current_user.email, job_id), priority)
+    
+    # Log start
+    create_task_log(db, task_id, "waiting", "Task queued")
+    
+    return {"task_id": task_id, "pdf_id": pdf.id}
+
 # File upload endpoint
 @app.post("/api/v1/upload-pdf/")
 async def upload_pdf(
@@ -58,31 +101,116 @@ async def upload_pdf(
     if current_user.role != UserRole.MEMBER:
         raise HTTPException(403, "Members only")
     
-    os.makedirs(settings.upload_dir, exist_ok=True)
-    file_path = os.path.join(settings.upload_dir, file.filename)
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
-    
-    pdf = create_pdf(db, PDFUpload(job_id=job_id, file_path=file_path))
-    
-    # Start Celery task
-    task = process_pdf_task.delay(file_path, job_id, settings.database_url)
-    
-    # Log start
-    create_task_log(db, task.id, "waiting", "Task queued")
+    return await save_upload(file, job_id, current_user, db, INTERACTIVE)
+
+# Batch upload endpoint, scheduled below single uploads
+@app.post("/api/v1/upload-pdfs/")
+async def upload_pdfs(
+    job_id: int = Form(...),
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    if current_user.role != UserRole.MEMBER:
+        raise HTTPException(403, "Members only")
     
-    return {"task_id": task.id, "pdf_id": pdf.id}
+    return [await save_upload(file, job_id, current_user, db, BULK) for file in files]
+
+# Authorized download; with nginx in front the transfer is handed off via X-Accel-Redirect
+@app.get("/api/v1/pdfs/{pdf_id}/download")
+def download_pdf(
+    pdf_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    pdf = get_pdf(db, pdf_id)
+    if pdf is None or not user_can_access_job(db, current_user, pdf.job_id):
+        raise HTTPException(404, "PDF not found")
+
+    storage = get_storage()
+    file_path = storage.local_path(pdf.content_hash) if pdf.content_hash else pdf.file_path
+    filename = pdf.original_filename or os.path.basename(pdf.file_path)
+
+    # Only nginx acts on X-Accel-Redirect; direct calls to the backend get the file itself
+    via_nginx = request.headers.get("x-accel-available") == "1"
+    accel_path = storage.accel_redirect_path(file_path) if settings.storage_accel_redirect and via_nginx else None
+    if accel_path:
+        return Response(
+            headers={
+                "X-Accel-Redirect": accel_path,
+                "Content-Type": "application/pdf",
+                "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+            }
+        )
+    if not os.path.exists(file_path):
+        raise HTTPException(404, "PDF not found")
+    return FileResponse(file_path, media_type="application/pdf", filename=filename)
 
 # Task status endpoint
 @app.get("/api/v1/task/{task_id}")
 def get_task_status(task_id: str):
-    result = AsyncResult(task_id)
+    result = AsyncResult(task_id, app=celery_app)
     return {
         "task_id": task_id,
         "status": result.status,
         "result": result.result if result.ready() else None
     }
 
+# Full task timeline from a single indexed query. Log messages can name any
+# job's documents and errors, so this is admin only.
+@app.get("/api/v1/task/{task_id}/history", response_model=List[TaskLogEntry])
+def get_task_timeline(
+    task_id: str,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    history = get_task_history(db, task_id)
+    if not history:
+        raise HTTPException(404, "Task not found")
+    return history
+
+# Queue depth and wait time per tenant, for tuning scheduler weights
+@app.get("/api/v1/scheduler/stats")
+def get_scheduler_stats(current_user: User = Depends(require_admin)):
+    return get_scheduler().stats()
+
+def enqueue_reextraction(result_id: int, fields: List[str], tenant: str, priority: str) -> str:
+    return submit_task(REEXTRACT_FIELDS_TASK, [result_id, settings.database_url, fields or None], tenant, priority)
+
+# Re-ask the model for a result's failed fields only, reusing its stored text
+@app.post("/api/v1/results/{result_id}/reextract")
+def reextract_result(
+    result_id: int,
+    fields: List[str] = Query([], description="Limit to these failed fields"),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    result = get_result(db, result_id)
+    if result is None:
+        raise HTTPException(404, "Result not found")
+    if not parse_result_errors(result.errors):
+        raise HTTPException(400, "Result has no failed fields")
+    tenant = tenant_for(current_user.email, result.job_id)
+    return {"result_id": result_id, "task_id": enqueue_reextraction(result_id, fields, tenant, INTERACTIVE)}
+
+@app.post("/api/v1/jobs/{job_id}/reextract")
+def reextract_job(
+    job_id: int,
+    fields: List[str] = Query([], description="Limit to these failed fields"),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    if get_job(db, job_id) is None:
+        raise HTTPException(404, "Job not found")
+    # Bulk priority, so a large job can't hold up other tenants' interactive uploads
+    tenant = tenant_for(current_user.email, job_id)
+    tasks = [
+        {"result_id": result_id, "task_id": enqueue_reextraction(result_id, fields, tenant, BULK)}
+        for result_id in get_result_ids_with_errors(db, job_id)
+    ]
+    return {"queued": len(tasks), "tasks": tasks}
+
 # Test prompt endpoint for admin
 @app.post("/api/v1/test-prompt/{job_id}")
 async def test_prompt(
@@ -92,6 +220,7 @@ async def test_prompt(
 ):
     # Similar to upload, but for testing, run sync or async, return result immediately
     # Implementation similar to upload, but sync call to task
+    from .tasks import process_pdf_task
     file_path = ...  # Save temp
     result = process_pdf_task(file_path, job_id, settings.database_url)  # Sync call for test
     return result
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, BigInteger, Float, Date, String, Text, DateTime, ForeignKey, JSON, Enum, Index, DDL, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -30,6 +30,7 @@ class Job(Base):
     prompt = Column(Text, nullable=False)
     fields = Column(JSON, nullable=False)  # e.g., {"name": {"type": "str", "required": True}, ...}
     assigned_emails = Column(JSON, nullable=False)  # List of emails
+    extraction_options = Column(JSON, nullable=True)  # OCR rasterization overrides, see extraction.RasterOptions
     status = Column(Enum(JobStatus), default=JobStatus.DRAFT)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -39,6 +40,8 @@ class PDF(Base):
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
     file_path = Column(String, nullable=False)
+    content_hash = Column(String, index=True)  # storage key, see storage.py
+    original_filename = Column(String)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     status = Column(String, default="uploaded")  # uploaded, processing, completed, failed
 
@@ -50,9 +53,90 @@ class Result(Base):
     extracted_fields = Column(JSON, nullable=False)
     processed_at = Column(DateTime(timezone=True), server_default=func.now())
     errors = Column(JSON, default=list)  # List of error messages
+    reextract_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+
+class DocumentText(Base):
+    """Extracted text of a processed document, kept for search and re-extraction."""
+    __tablename__ = "document_texts"
+    id = Column(Integer, primary_key=True, index=True)
+    result_id = Column(Integer, ForeignKey("results.id"), unique=True, nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
+    text = Column(Text, nullable=False)
+    fields_text = Column(Text)  # "name: value" lines of the extracted fields
+
+class DocumentField(Base):
+    """Typed copy of each extracted field value, for indexed filtering (see search.py)."""
+    __tablename__ = "document_fields"
+    id = Column(Integer, primary_key=True, index=True)
+    result_id = Column(Integer, ForeignKey("results.id"), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    name = Column(String, nullable=False)
+    text_value = Column(String)  # casefolded
+    num_value = Column(Float)
+    date_value = Column(Date)
+    __table_args__ = (
+        Index("ix_document_fields_result_name", "result_id", "name"),
+        Index("ix_document_fields_job_name_text", "job_id", "name", "text_value"),
+        Index("ix_document_fields_job_name_num", "job_id", "name", "num_value"),
+        Index("ix_document_fields_job_name_date", "job_id", "name", "date_value"),
+    )
+
+# Full-text index over document_texts: GIN on a tsvector expression on PostgreSQL,
+# an external-content FTS5 table kept in sync by triggers on SQLite.
+DOCUMENT_TSVECTOR = (
+    "setweight(to_tsvector('english', coalesce(fields_text, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(text, '')), 'B')"
+)
+
+event.listen(
+    DocumentText.__table__, "after_create",
+    DDL(f"CREATE INDEX ix_document_texts_fts ON document_texts USING gin (({DOCUMENT_TSVECTOR}))")
+    .execute_if(dialect="postgresql"),
+)
+
+for ddl in (
+    "CREATE VIRTUAL TABLE document_texts_fts USING fts5(fields_text, text, content='document_texts', content_rowid='id')",
+    "CREATE TRIGGER document_texts_ai AFTER INSERT ON document_texts BEGIN "
+    "INSERT INTO document_texts_fts(rowid, fields_text, text) VALUES (new.id, new.fields_text, new.text); END",
+    "CREATE TRIGGER document_texts_ad AFTER DELETE ON document_texts BEGIN "
+    "INSERT INTO document_texts_fts(document_texts_fts, rowid, fields_text, text) "
+    "VALUES ('delete', old.id, old.fields_text, old.text); END",
+    "CREATE TRIGGER document_texts_au AFTER UPDATE ON document_texts BEGIN "
+    "INSERT INTO document_texts_fts(document_texts_fts, rowid, fields_text, text) "
+    "VALUES ('delete', old.id, old.fields_text, old.text); "
+    "INSERT INTO document_texts_fts(rowid, fields_text, text) VALUES (new.id, new.fields_text, new.text); END",
+):
+    event.listen(DocumentText.__table__, "after_create", DDL(ddl).execute_if(dialect="sqlite"))
+event.listen(
+    DocumentText.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS document_texts_fts").execute_if(dialect="sqlite"),
+)
+
+class JobStats(Base):
+    """Per-job counters, updated in the same transaction as each result (see crud.create_result)."""
+    __tablename__ = "job_stats"
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    documents_processed = Column(Integer, nullable=False, default=0)
+    documents_with_errors = Column(Integer, nullable=False, default=0)
+    documents_failed = Column(Integer, nullable=False, default=0)  # tasks that ended without a result
+    timed_documents = Column(Integer, nullable=False, default=0)
+    total_processing_ms = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class JobFieldStats(Base):
+    __tablename__ = "job_field_stats"
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    field = Column(String, primary_key=True)
+    missing = Column(Integer, nullable=False, default=0)
+    invalid = Column(Integer, nullable=False, default=0)
 
 class TaskLog(Base):
     __tablename__ = "task_logs"
+    # On PostgreSQL the table is range-partitioned by month on timestamp (see retention.py)
+    __table_args__ = (
+        Index("ix_task_logs_task_id_timestamp", "task_id", "timestamp"),
+        Index("ix_task_logs_timestamp", "timestamp"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(String, nullable=False)
     status = Column(String, nullable=False)  # waiting, running, finished, failed
@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+from typing import Dict, Optional
+
+from PIL import Image
+
+from .core.config import settings
+
+# Seconds to wait for a pooled tesserocr handle before giving up on the page
+ACQUIRE_TIMEOUT = 300
+
+
+class OCRBackend:
+    """Turns an in-memory page image into text."""
+
+    name = "base"
+
+    def image_to_string(self, image: Image.Image, lang: str = "eng", dpi: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+
+class PytesseractBackend(OCRBackend):
+    """Default backend: one `tesseract` subprocess per page."""
+
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = settings.tesseract_path
+        self._pytesseract = pytesseract
+
+    def image_to_string(self, image: Image.Image, lang: str = "eng", dpi: Optional[int] = None) -> str:
+        config = f"--dpi {dpi}" if dpi else ""
+        return self._pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+def _run_blocking(func, *args):
+    """Run a blocking C call; under gevent, on the hub's threadpool so other greenlets keep running."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return func(*args)
+    if not monkey.is_module_patched("threading"):
+        return func(*args)
+    import gevent
+    return gevent.get_hub().threadpool.apply(func, args)
+
+
+class TesserocrBackend(OCRBackend):
+    """Long-lived Tesseract API handles via the C API bindings (tesserocr).
+
+    Handles are created lazily in each worker process (never shared across a
+    fork) and kept in a small pool, so the language model is loaded once per
+    handle instead of once per page. Images are passed in memory.
+
+    Pages wait for a free handle, so under a gevent worker with high
+    concurrency raise `ocr_pool_size` (or use a prefork pool); recognition
+    itself runs on gevent's threadpool so it doesn't stall the hub.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, pool_size: Optional[int] = None):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._pool_size = max(1, pool_size or settings.ocr_pool_size)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pools: Dict[str, queue.LifoQueue] = {}
+        self._created: Dict[str, int] = {}
+
+    def _acquire(self, lang: str):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked after handles were created; the parent's handles are unusable here
+                self._reset()
+            pool = self._pools.setdefault(lang, queue.LifoQueue())
+            try:
+                return pool, pool.get_nowait()
+            except queue.Empty:
+                pass
+            if self._created.get(lang, 0) < self._pool_size:
+                kwargs = {"lang": lang}
+                if settings.tessdata_path:
+                    kwargs["path"] = settings.tessdata_path
+                # Count the handle only once it exists, so a bad lang/tessdata can't leak a slot
+                api = self._tesserocr.PyTessBaseAPI(**kwargs)
+                self._created[lang] = self._created.get(lang, 0) + 1
+                return pool, api
+        try:
+            return pool, pool.get(timeout=ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            raise TimeoutError(f"No tesserocr handle for '{lang}' became free within {ACQUIRE_TIMEOUT}s")
+
+    @staticmethod
+    def _recognize(api, image: Image.Image, dpi: Optional[int]) -> str:
+        api.SetImage(image)
+        if dpi:
+            api.SetSourceResolution(dpi)
+        return api.GetUTF8Text()
+
+    def image_to_string(self, image: Image.Image, lang: str = "eng", dpi: Optional[int] = None) -> str:
+        pool, api = self._acquire(lang)
+        try:
+            return _run_blocking(self._recognize, api, image, dpi)
+        finally:
+            api.Clear()
+            pool.put(api)
+
+
+OCR_BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+
+_backends: Dict[str, OCRBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_ocr_backend(name: Optional[str] = None) -> OCRBackend:
+    """Return the process-wide instance of the configured (or named) OCR backend."""
+    name = name or settings.ocr_backend
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name not in OCR_BACKENDS:
+                raise ValueError(f"Unknown OCR backend '{name}', expected one of {sorted(OCR_BACKENDS)}")
+            backend = _backends[name] = OCR_BACKENDS[name]()
+        return backend
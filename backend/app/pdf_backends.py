@@ -0,0 +1,149 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from .core.config import settings
+
+POINTS_PER_INCH = 72.0
+
+
+class PDFDocument:
+    """An open PDF. Pages are numbered from 1, like pdftoppm."""
+
+    page_count = 0
+
+    def page_size(self, page_num: int) -> Tuple[float, float]:
+        """Media box width and height in points."""
+        raise NotImplementedError
+
+    def page_text(self, page_num: int) -> str:
+        raise NotImplementedError
+
+    def render(self, page_num: int, dpi: int, grayscale: bool = True) -> Optional[Image.Image]:
+        """Rasterize a page in-process, or None to fall back to pdf2image."""
+        return None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PDFBackend:
+    """Reads the text layer (and optionally renders pages) of a PDF."""
+
+    name = "base"
+
+    def open(self, pdf_path: str) -> PDFDocument:
+        raise NotImplementedError
+
+
+class PyPDF2Document(PDFDocument):
+    def __init__(self, reader_cls, pdf_path: str):
+        self._file = open(pdf_path, "rb")
+        try:
+            self._reader = reader_cls(self._file)
+            self.page_count = len(self._reader.pages)
+        except Exception:
+            self._file.close()
+            raise
+
+    def page_size(self, page_num: int) -> Tuple[float, float]:
+        box = self._reader.pages[page_num - 1].mediabox
+        return float(box.width), float(box.height)
+
+    def page_text(self, page_num: int) -> str:
+        return self._reader.pages[page_num - 1].extract_text() or ""
+
+    def close(self):
+        self._file.close()
+
+
+class PyPDF2Backend(PDFBackend):
+    """Default backend: pure Python, no native dependencies. Pages are rendered by poppler."""
+
+    name = "pypdf2"
+
+    def __init__(self):
+        from PyPDF2 import PdfReader
+        self._reader_cls = PdfReader
+
+    def open(self, pdf_path: str) -> PDFDocument:
+        return PyPDF2Document(self._reader_cls, pdf_path)
+
+
+class PdfiumDocument(PDFDocument):
+    def __init__(self, pdfium, pdf_path: str):
+        self._pdf = pdfium.PdfDocument(pdf_path)
+        self.page_count = len(self._pdf)
+
+    def page_size(self, page_num: int) -> Tuple[float, float]:
+        page = self._pdf[page_num - 1]
+        try:
+            width, height = page.get_size()
+            return float(width), float(height)
+        finally:
+            page.close()
+
+    def page_text(self, page_num: int) -> str:
+        page = self._pdf[page_num - 1]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
+            page.close()
+
+    def render(self, page_num: int, dpi: int, grayscale: bool = True) -> Optional[Image.Image]:
+        page = self._pdf[page_num - 1]
+        try:
+            return page.render(scale=dpi / POINTS_PER_INCH, grayscale=grayscale).to_pil()
+        finally:
+            page.close()
+
+    def close(self):
+        self._pdf.close()
+
+
+class PdfiumBackend(PDFBackend):
+    """PDFium via pypdfium2: native text extraction and in-process rendering.
+
+    Much faster than PyPDF2 on large or complex files, and OCR pages are
+    rendered without spawning pdftoppm. PDFium is not thread-safe, so a
+    document must stay on the thread that opened it.
+    """
+
+    name = "pypdfium2"
+
+    def __init__(self):
+        import pypdfium2
+        self._pdfium = pypdfium2
+
+    def open(self, pdf_path: str) -> PDFDocument:
+        return PdfiumDocument(self._pdfium, pdf_path)
+
+
+PDF_BACKENDS = {
+    PyPDF2Backend.name: PyPDF2Backend,
+    PdfiumBackend.name: PdfiumBackend,
+}
+
+_backends: Dict[str, PDFBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_pdf_backend(name: Optional[str] = None) -> PDFBackend:
+    """Return the process-wide instance of the configured (or named) PDF backend."""
+    name = name or settings.pdf_backend
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name not in PDF_BACKENDS:
+                raise ValueError(f"Unknown PDF backend '{name}', expected one of {sorted(PDF_BACKENDS)}")
+            backend = _backends[name] = PDF_BACKENDS[name]()
+        return backend
@@ -0,0 +1,155 @@
+import json
+import re
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+# How a field value was recovered from the model response
+SOURCE_JSON = "json"                    # response was a bare JSON object
+SOURCE_EMBEDDED_JSON = "embedded_json"  # JSON inside code fences / prose
+SOURCE_KEY_VALUE = "key_value"          # "field: value" line fallback
+SOURCE_DEFAULT = "default"              # nothing recovered, placeholder value
+SOURCE_MISSING = "missing"              # JSON parsed but field absent
+
+_OPENER_RE = re.compile(r"[{\[]")
+_CLOSERS = {"{": "}", "[": "]"}
+_TRAILING_RE = re.compile(r"[\s,}\]]+$")
+_SEPARATOR_RE = re.compile(r"[\s_\-]+")
+_decoder = json.JSONDecoder()
+
+
+class ParsedResponse(NamedTuple):
+    fields: Dict[str, Any]
+    sources: Dict[str, str]
+
+
+def _normalize_key(key: str) -> str:
+    return _SEPARATOR_RE.sub("", key).casefold()
+
+
+def _skip_container(text: str, start: int) -> int:
+    """Index just past the bracket closing the one at `start`, or len(text) if it never closes."""
+    stack = []
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+            if not stack:
+                return i + 1
+    return len(text)
+
+
+def find_json(response: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+    """Decode the first JSON object (or array holding one) in `response`.
+
+    Returns (data, embedded) where `embedded` is False when the whole response
+    was JSON, or None if no JSON object could be decoded.
+    """
+    stripped = response.strip()
+    pos = 0
+    while True:
+        match = _OPENER_RE.search(stripped, pos)
+        if match is None:
+            return None
+        start = match.start()
+        try:
+            data, end = _decoder.raw_decode(stripped, start)
+        except json.JSONDecodeError:
+            # Don't mistake an object nested in a broken or truncated one for the answer
+            pos = _skip_container(stripped, start)
+            continue
+        if isinstance(data, list):
+            data = next((item for item in data if isinstance(item, dict)), None)
+        if isinstance(data, dict):
+            return data, not (start == 0 and end == len(stripped))
+        # Some other JSON value (e.g. "[1]" in prose); skip past it
+        pos = end
+
+
+class FieldMatcher:
+    """Single multi-pattern matcher for "field: value" pairs, built from a job's fields.
+
+    Field names match case-insensitively and treat spaces, underscores and
+    hyphens as interchangeable, so `invoice_number` also finds "Invoice Number:".
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = list(fields)
+        self.field_set = set(self.fields)
+        self._canonical: Dict[str, str] = {}
+        alternatives = []
+        for field in self.fields:
+            key = _normalize_key(field)
+            if not key or key in self._canonical:
+                continue
+            self._canonical[key] = field
+            tokens = [re.escape(t) for t in _SEPARATOR_RE.split(field.strip()) if t]
+            alternatives.append(r"[\s_\-]*".join(tokens))
+
+        self._line_re = None
+        if alternatives:
+            # Longest names first so "total amount" wins over "total"
+            alternatives.sort(key=len, reverse=True)
+            self._line_re = re.compile(
+                r"(?<![^\W_])(" + "|".join(alternatives) + r")(?![^\W_])[^:=\n]*?[:=][ \t]*"
+                r"(?:\"([^\"\n]*)\"|'([^'\n]*)'|([^\n]*))",
+                re.IGNORECASE,
+            )
+
+    def canonical(self, key: str) -> Optional[str]:
+        return self._canonical.get(_normalize_key(key))
+
+    def match_pairs(self, response: str) -> Dict[str, str]:
+        result: Dict[str, str] = {}
+        if self._line_re is None:
+            return result
+        for m in self._line_re.finditer(response):
+            field = self._canonical[_normalize_key(m.group(1))]
+            if field in result:
+                continue
+            double_quoted, single_quoted, raw = m.group(2, 3, 4)
+            if double_quoted is not None:
+                result[field] = double_quoted
+            elif single_quoted is not None:
+                result[field] = single_quoted
+            else:
+                result[field] = _TRAILING_RE.sub("", raw).strip().strip("\"'")
+        return result
+
+
+def parse_response(response: str, matcher: FieldMatcher) -> ParsedResponse:
+    """Parse a model response into field values, tagging where each came from."""
+    found = find_json(response)
+    if found is not None:
+        data, embedded = found
+        source = SOURCE_EMBEDDED_JSON if embedded else SOURCE_JSON
+        fields: Dict[str, Any] = {}
+        for key, value in data.items():
+            canonical = None if key in matcher.field_set else matcher.canonical(key)
+            if canonical and canonical not in data:
+                # "Invoice Number" -> "invoice_number"
+                fields.setdefault(canonical, value)
+            else:
+                fields[key] = value
+        sources = {f: (source if f in fields else SOURCE_MISSING) for f in matcher.fields}
+        return ParsedResponse(fields, sources)
+
+    fields = matcher.match_pairs(response)
+    if fields:
+        sources = {f: (SOURCE_KEY_VALUE if f in fields else SOURCE_MISSING) for f in matcher.fields}
+        return ParsedResponse(fields, sources)
+
+    return ParsedResponse(
+        {f: "N/A" for f in matcher.fields},
+        {f: SOURCE_DEFAULT for f in matcher.fields},
+    )
@@ -0,0 +1,172 @@
+"""TaskLog partitioning and retention.
+
+On PostgreSQL `task_logs` is created as a table range-partitioned by month on
+`timestamp`, so expiring old history is a `DROP TABLE` of whole partitions.
+Elsewhere (SQLite, or a Postgres database created before partitioning) the
+same retention is applied with batched deletes.
+
+Old history is also compacted: once a task is older than
+`task_log_compact_after_days`, only its final finished/failed row is kept.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, delete, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .core.config import settings
+from .models import TaskLog
+
+TABLE = "task_logs"
+TERMINAL_STATUSES = ("finished", "failed")
+
+_PARTITIONED_DDL = [
+    f"""
+    CREATE TABLE {TABLE} (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        task_id VARCHAR NOT NULL,
+        status VARCHAR NOT NULL,
+        log_message TEXT,
+        timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp)
+    """,
+    f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT",
+]
+
+_INDEX_DDL = [
+    "CREATE INDEX {concurrently}IF NOT EXISTS ix_task_logs_task_id_timestamp ON " + TABLE + " (task_id, timestamp)",
+    "CREATE INDEX {concurrently}IF NOT EXISTS ix_task_logs_timestamp ON " + TABLE + " (timestamp)",
+]
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    month = moment.month - 1 + months
+    return moment.replace(year=moment.year + month // 12, month=month % 12 + 1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(engine: Engine) -> bool:
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as conn:
+        return bool(conn.execute(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t)"), {"t": TABLE}
+        ).scalar())
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t)"), {"t": name}).scalar() is not None
+
+
+def create_partitioned_table(engine: Engine):
+    """Create `task_logs` as a partitioned table on PostgreSQL, before `create_all` runs."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        if not _exists(conn, TABLE):
+            # create_all skips the table once it exists, so its indexes are created here
+            for ddl in _PARTITIONED_DDL + [ddl.format(concurrently="") for ddl in _INDEX_DDL]:
+                conn.execute(text(ddl))
+
+
+def ensure_indexes(engine: Engine):
+    """Add the history indexes to a `task_logs` table created before they existed.
+
+    This can take a while on a large table, so it runs from
+    `python -m app.cli init-db` rather than at API startup. On PostgreSQL the
+    indexes are built CONCURRENTLY (outside a transaction) so log writes
+    aren't blocked meanwhile.
+    """
+    if is_partitioned(engine):
+        return  # indexed when created; CONCURRENTLY isn't supported on partitioned tables
+    concurrently = "CONCURRENTLY " if engine.dialect.name == "postgresql" else ""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for ddl in _INDEX_DDL:
+            conn.execute(text(ddl.format(concurrently=concurrently)))
+
+
+def ensure_partitions(engine: Engine, months_ahead: int = 2) -> List[str]:
+    """Create monthly partitions from the current month up to `months_ahead` months out."""
+    created = []
+    if not is_partitioned(engine):
+        return created
+    start = _month_start(datetime.now(timezone.utc))
+    for offset in range(months_ahead + 1):
+        month = _add_months(start, offset)
+        name = _partition_name(month)
+        with engine.begin() as conn:
+            if _exists(conn, name):
+                continue
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            ))
+        created.append(name)
+    return created
+
+
+def _partitions(engine: Engine) -> List[Tuple[str, datetime]]:
+    """Monthly partitions with the (exclusive) end of the month they hold."""
+    with engine.connect() as conn:
+        names = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:t)"
+        ), {"t": TABLE}).scalars().all()
+    partitions = []
+    for name in names:
+        suffix = name[len(TABLE) + 1:]
+        if len(suffix) != 8 or suffix[0] != "y" or suffix[5] != "m":
+            continue  # default partition or something we didn't create
+        month = datetime(int(suffix[1:5]), int(suffix[6:8]), 1, tzinfo=timezone.utc)
+        partitions.append((name, _add_months(month, 1)))
+    return partitions
+
+
+def _delete_in_batches(engine: Engine, condition, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        batch = select(TaskLog.id).where(condition).limit(batch_size)
+        with engine.begin() as conn:
+            rowcount = conn.execute(delete(TaskLog).where(TaskLog.id.in_(batch))).rowcount
+        deleted += rowcount
+        if rowcount < batch_size:
+            return deleted
+
+
+def drop_expired(engine: Engine, cutoff: datetime, batch_size: int = 10000) -> Dict[str, int]:
+    """Remove history older than `cutoff`: whole partitions when possible, batched deletes otherwise."""
+    dropped = 0
+    if is_partitioned(engine):
+        for name, end in _partitions(engine):
+            if end <= cutoff:
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP TABLE {name}"))
+                dropped += 1
+    # Whatever is left (unpartitioned table, default partition, the partially expired month)
+    deleted = _delete_in_batches(engine, TaskLog.timestamp < cutoff, batch_size)
+    return {"partitions_dropped": dropped, "rows_deleted": deleted}
+
+
+def compact(engine: Engine, before: datetime, batch_size: int = 10000) -> int:
+    """Drop intermediate progress rows older than `before`, keeping each task's final status row."""
+    condition = and_(TaskLog.timestamp < before, TaskLog.status.notin_(TERMINAL_STATUSES))
+    return _delete_in_batches(engine, condition, batch_size)
+
+
+def run_retention(engine: Engine, retention_days: int = None, compact_after_days: int = None) -> Dict[str, int]:
+    retention_days = settings.task_log_retention_days if retention_days is None else retention_days
+    compact_after_days = settings.task_log_compact_after_days if compact_after_days is None else compact_after_days
+    now = datetime.now(timezone.utc)
+
+    summary = {"partitions_created": len(ensure_partitions(engine))}
+    summary.update(drop_expired(engine, now - timedelta(days=retention_days)))
+    summary["rows_compacted"] = compact(engine, now - timedelta(days=compact_after_days))
+    return summary
@@ -0,0 +1,250 @@
+"""Fair-share dispatch of processing tasks across tenants (members or jobs).
+
+Uploads are not sent to Celery directly. They are parked in per-tenant Redis
+sub-queues, one per priority level, and a dispatcher process moves them onto
+the Celery queue using weighted round-robin over the tenants with pending
+work. Each tenant can have at most `scheduler_tenant_concurrency` tasks in
+flight; slots are leases (task id + start time) so a crashed worker can't
+hold one forever.
+
+Run the dispatcher with:
+
+    python -m app.scheduling
+"""
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from .core.celery_app import celery_app
+from .core.config import settings
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)  # highest first
+
+_PREFIX = "sched"
+
+logger = logging.getLogger(__name__)
+
+# KEYS: queue, ring   ARGV: tenant, entry
+_ENQUEUE = """
+redis.call('RPUSH', KEYS[1], ARGV[2])
+if not redis.call('LPOS', KEYS[2], ARGV[1]) then
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# KEYS: queue, running   ARGV: cap, now, lease_seconds
+# Returns {-1} when the tenant is at its cap, {0} when its queue is empty, {1, entry} otherwise.
+_POP = """
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', tonumber(ARGV[2]) - tonumber(ARGV[3]))
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[1]) then
+    return {-1}
+end
+local entry = redis.call('LPOP', KEYS[1])
+if not entry then
+    return {0}
+end
+local task_id = cjson.decode(entry)['id']
+redis.call('ZADD', KEYS[2], ARGV[2], task_id)
+return {1, entry}
+"""
+
+# KEYS: queue, ring   ARGV: tenant
+_RETIRE = """
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('LREM', KEYS[2], 0, ARGV[1])
+end
+return 1
+"""
+
+
+# KEYS: queue, ring, running   ARGV: tenant, entry, task_id
+# Undo a _POP whose send failed: entry back at the head of its queue, slot freed.
+_REQUEUE = """
+redis.call('LPUSH', KEYS[1], ARGV[2])
+if not redis.call('LPOS', KEYS[2], ARGV[1]) then
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+end
+redis.call('ZREM', KEYS[3], ARGV[3])
+return 1
+"""
+
+
+def tenant_for(member_email: str, job_id: int) -> str:
+    if settings.scheduler_tenant_by == "job":
+        return f"job:{job_id}"
+    return f"member:{member_email}"
+
+
+class FairScheduler:
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.redis = client or redis.Redis.from_url(settings.redis_url)
+        self._enqueue = self.redis.register_script(_ENQUEUE)
+        self._pop = self.redis.register_script(_POP)
+        self._retire = self.redis.register_script(_RETIRE)
+        self._requeue = self.redis.register_script(_REQUEUE)
+
+    @staticmethod
+    def _queue_key(priority: str, tenant: str) -> str:
+        return f"{_PREFIX}:queue:{priority}:{tenant}"
+
+    @staticmethod
+    def _ring_key(priority: str) -> str:
+        return f"{_PREFIX}:ring:{priority}"
+
+    @staticmethod
+    def _running_key(tenant: str) -> str:
+        return f"{_PREFIX}:running:{tenant}"
+
+    @staticmethod
+    def _wait_key(tenant: str) -> str:
+        return f"{_PREFIX}:wait:{tenant}"
+
+    def enqueue(self, tenant: str, task_name: str, args: List[Any], priority: str = INTERACTIVE) -> str:
+        """Park a task for `tenant` and return the Celery task id it will run under."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+        task_id = str(uuid.uuid4())
+        entry = json.dumps({
+            "id": task_id,
+            "task": task_name,
+            "args": args,
+            "priority": priority,
+            "enqueued_at": time.time(),
+        })
+        self._enqueue(keys=[self._queue_key(priority, tenant), self._ring_key(priority)], args=[tenant, entry])
+        return task_id
+
+    def _next_tenant(self, priority: str) -> Optional[str]:
+        # Rotate the ring: head moves to the tail and is served this turn
+        tenant = self.redis.lmove(self._ring_key(priority), self._ring_key(priority), "LEFT", "RIGHT")
+        return tenant.decode() if tenant is not None else None
+
+    def _send(self, tenant: str, raw_entry: str, priority: str, now: float):
+        entry = json.loads(raw_entry)
+        try:
+            celery_app.send_task(entry["task"], args=entry["args"], kwargs={"tenant": tenant}, task_id=entry["id"])
+        except Exception:
+            self._requeue(
+                keys=[self._queue_key(priority, tenant), self._ring_key(priority), self._running_key(tenant)],
+                args=[tenant, raw_entry, entry["id"]],
+            )
+            raise
+
+        wait = max(0.0, now - entry["enqueued_at"])
+        key = self._wait_key(tenant)
+        pipe = self.redis.pipeline()
+        pipe.hincrby(key, "dispatched", 1)
+        pipe.hincrbyfloat(key, "wait_total", wait)
+        pipe.hincrbyfloat(key, f"wait_total:{entry['priority']}", wait)
+        pipe.hincrby(key, f"dispatched:{entry['priority']}", 1)
+        pipe.execute()
+        current_max = float(self.redis.hget(key, "wait_max") or 0)
+        if wait > current_max:
+            self.redis.hset(key, "wait_max", wait)
+
+    def dispatch(self, limit: int = 100) -> int:
+        """Move up to `limit` tasks to Celery. Higher priorities are drained first."""
+        cap = settings.scheduler_tenant_concurrency
+        lease = settings.scheduler_lease_seconds
+        sent = 0
+        for priority in PRIORITIES:
+            ring_size = self.redis.llen(self._ring_key(priority))
+            # One full turn of the ring per pass; stop when nobody could send
+            while sent < limit and ring_size:
+                progressed = False
+                for _ in range(ring_size):
+                    tenant = self._next_tenant(priority)
+                    if tenant is None:
+                        break
+                    queue_key = self._queue_key(priority, tenant)
+                    credits = settings.scheduler_weights.get(tenant, settings.scheduler_default_weight)
+                    for _ in range(max(1, credits)):
+                        if sent >= limit:
+                            break
+                        now = time.time()
+                        popped = self._pop(keys=[queue_key, self._running_key(tenant)], args=[cap, now, lease])
+                        if popped[0] != 1:
+                            break
+                        self._send(tenant, popped[1], priority, now)
+                        sent += 1
+                        progressed = True
+                    self._retire(keys=[queue_key, self._ring_key(priority)], args=[tenant])
+                if not progressed:
+                    break
+                ring_size = self.redis.llen(self._ring_key(priority))
+        return sent
+
+    def release(self, tenant: str, task_id: str):
+        """Free the tenant's concurrency slot held by `task_id`."""
+        self.redis.zrem(self._running_key(tenant), task_id)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, in-flight count and queue wait time per tenant."""
+        tenants = set()
+        for key in self.redis.scan_iter(f"{_PREFIX}:wait:*"):
+            tenants.add(key.decode().split(":", 2)[2])
+        for priority in PRIORITIES:
+            tenants.update(t.decode() for t in self.redis.lrange(self._ring_key(priority), 0, -1))
+
+        report = {}
+        for tenant in sorted(tenants):
+            wait = {k.decode(): float(v) for k, v in self.redis.hgetall(self._wait_key(tenant)).items()}
+            dispatched = int(wait.get("dispatched", 0))
+            row = {
+                "weight": settings.scheduler_weights.get(tenant, settings.scheduler_default_weight),
+                "running": self.redis.zcard(self._running_key(tenant)),
+                "queued": {p: self.redis.llen(self._queue_key(p, tenant)) for p in PRIORITIES},
+                "dispatched": dispatched,
+                "avg_wait_seconds": wait.get("wait_total", 0.0) / dispatched if dispatched else None,
+                "max_wait_seconds": wait.get("wait_max"),
+                "avg_wait_seconds_by_priority": {},
+            }
+            for p in PRIORITIES:
+                count = int(wait.get(f"dispatched:{p}", 0))
+                if count:
+                    row["avg_wait_seconds_by_priority"][p] = wait.get(f"wait_total:{p}", 0.0) / count
+            report[tenant] = row
+        return report
+
+
+_scheduler: Optional[FairScheduler] = None
+
+
+def get_scheduler() -> FairScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairScheduler()
+    return _scheduler
+
+
+def submit_task(task_name: str, args: List[Any], tenant: str, priority: str = INTERACTIVE) -> str:
+    """Queue a task through the fair-share scheduler (or straight to Celery when it's disabled)."""
+    if not settings.scheduler_enabled:
+        return celery_app.send_task(task_name, args=args).id
+    return get_scheduler().enqueue(tenant, task_name, args, priority=priority)
+
+
+def run_dispatcher(poll_interval: float = 0.5, batch: int = 100):
+    scheduler = get_scheduler()
+    print(f"Fair-share dispatcher running (cap {settings.scheduler_tenant_concurrency} per tenant)")
+    while True:
+        try:
+            sent = scheduler.dispatch(limit=batch)
+        except Exception:
+            # Broker or Redis hiccup; the unsent entry was put back, so just try again
+            logger.exception("Dispatch failed")
+            sent = 0
+        if sent < batch:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_dispatcher()
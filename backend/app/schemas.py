@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from .models import UserRole, JobStatus
@@ -13,6 +13,12 @@ class UserCreate(UserBase):
 class AdminCreate(UserBase):
     password: str
 
+def _check_extraction_options(options: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Imported here so the API doesn't load the imaging stack at startup
+    from .extraction import RasterOptions
+    RasterOptions.from_dict(options)
+    return options
+
 class User(UserBase):
     id: int
     role: UserRole
@@ -27,9 +33,10 @@ class JobBase(BaseModel):
     prompt: str
     fields: Dict[str, Dict[str, Any]]
     assigned_emails: List[str]
+    extraction_options: Optional[Dict[str, Any]] = None
 
 class JobCreate(JobBase):
-    pass
+    _validate_extraction_options = field_validator("extraction_options")(_check_extraction_options)
 
 class JobUpdate(BaseModel):
     title: Optional[str]
@@ -37,8 +44,11 @@ class JobUpdate(BaseModel):
     prompt: Optional[str]
     fields: Optional[Dict[str, Dict[str, Any]]]
     assigned_emails: Optional[List[str]]
+    extraction_options: Optional[Dict[str, Any]] = None
     status: Optional[JobStatus]
 
+    _validate_extraction_options = field_validator("extraction_options")(_check_extraction_options)
+
 class JobDeleteRequest(BaseModel):
     job_ids: List[int]
 
@@ -54,6 +64,8 @@ class Job(JobBase):
 class PDFUpload(BaseModel):
     job_id: int
     file_path: str  # Will be set by backend
+    content_hash: Optional[str] = None
+    original_filename: Optional[str] = None
 
 class ResultBase(BaseModel):
     job_id: int
@@ -67,6 +79,7 @@ class ResultCreate(ResultBase):
 class Result(ResultBase):
     id: int
     processed_at: datetime
+    reextract_attempts: int = 0
 
     class Config:
         from_attributes = True
@@ -74,4 +87,43 @@ class Result(ResultBase):
 class TaskStatus(BaseModel):
     task_id: str
     status: str
-    message: Optional[str]
\ No newline at end of file
+    message: Optional[str]
+
+class TaskLogEntry(BaseModel):
+    id: int
+    task_id: str
+    status: str
+    log_message: Optional[str]
+    timestamp: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class FieldErrorCounts(BaseModel):
+    missing: int
+    invalid: int
+
+class JobStats(BaseModel):
+    job_id: int
+    documents_processed: int
+    documents_with_errors: int
+    documents_failed: int
+    failure_rate: float
+    avg_processing_ms: Optional[float]
+    fields: Dict[str, FieldErrorCounts]
+    updated_at: Optional[datetime]
+
+class SearchHit(BaseModel):
+    result_id: int
+    job_id: int
+    pdf_id: int
+    extracted_fields: Dict[str, Any]
+    errors: List[str] = []
+    rank: Optional[float]
+
+class SearchResponse(BaseModel):
+    results: List[SearchHit]
+    limit: int
+    offset: int
+    has_more: bool
@@ -0,0 +1,206 @@
+"""Search over processed documents: full text plus typed field filters.
+
+Text goes into `document_texts` (full-text indexed, see models.py) and every
+extracted field value into `document_fields` with text, numeric and date
+columns, each indexed by (job_id, name, value). A query such as "invoices
+from vendor X over 10k" becomes an FTS match plus indexed field lookups.
+"""
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, column, exists, func, literal_column, select, table, text as sql_text
+from sqlalchemy.orm import Session
+
+from .models import DOCUMENT_TSVECTOR, DocumentField, DocumentText, Result
+
+MAX_LIMIT = 100
+FILTER_OPS = ("eq", "contains", "gt", "gte", "lt", "lte")
+
+# A sign only counts at the start or after whitespace / a currency symbol, so "INV-1001" isn't -1001
+_SIGN = r"(?:(?:^|(?<=[\s$€£¥₹]))[-+])?"
+_NUMBER_RE = re.compile(r"^[^\d\-+.]{0,4}(" + _SIGN + r"\d[\d,\s]*(?:\.\d+)?|" + _SIGN + r"\.\d+)[^\d]{0,4}$")
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_FTS5_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """Read numbers like 12400, "12,400.00" or "$ 12,400.00 USD"."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.match(str(value).strip())
+    if not match:
+        return None
+    try:
+        return float(re.sub(r"[,\s]", "", match.group(1)))
+    except ValueError:
+        return None
+
+
+def parse_date(value: Any, formats: Optional[List[str]] = None) -> Optional[date]:
+    text = str(value).strip()
+    for fmt in formats or []:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    if _ISO_DATE_RE.match(text):
+        try:
+            return date.fromisoformat(text[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _field_rows(result: Result, fields_spec: Dict[str, Dict]) -> List[DocumentField]:
+    rows = []
+    for name, value in (result.extracted_fields or {}).items():
+        if value is None or isinstance(value, (dict, list)):
+            continue
+        spec = fields_spec.get(name) or {}
+        formats = spec.get("formats") or ([spec["format"]] if spec.get("format") else [])
+        rows.append(DocumentField(
+            result_id=result.id,
+            job_id=result.job_id,
+            name=name,
+            text_value=str(value).strip().casefold()[:255],
+            num_value=parse_number(value),
+            date_value=parse_date(value, formats),
+        ))
+    return rows
+
+
+def _fields_text(extracted_fields: Dict[str, Any]) -> str:
+    return "\n".join(f"{k}: {v}" for k, v in (extracted_fields or {}).items() if v is not None)
+
+
+def index_document(db: Session, result: Result, text: Optional[str], fields_spec: Dict[str, Dict]):
+    """Add (or refresh) a result in the search index. Pass text=None to keep the stored text."""
+    doc = db.query(DocumentText).filter(DocumentText.result_id == result.id).first()
+    if doc is None:
+        doc = DocumentText(result_id=result.id, job_id=result.job_id, text=text or "")
+        db.add(doc)
+    elif text is not None:
+        doc.text = text
+    doc.fields_text = _fields_text(result.extracted_fields)
+
+    db.query(DocumentField).filter(DocumentField.result_id == result.id).delete(synchronize_session=False)
+    db.add_all(_field_rows(result, fields_spec))
+    db.commit()
+
+
+def get_document_text(db: Session, result_id: int) -> Optional[str]:
+    doc = db.query(DocumentText.text).filter(DocumentText.result_id == result_id).first()
+    return doc[0] if doc else None
+
+
+def parse_filter(expression: str) -> Tuple[str, str, str]:
+    """"total:gt:10000" -> ("total", "gt", "10000"). A bare "vendor:acme" means eq."""
+    parts = expression.split(":", 2)
+    if len(parts) == 2:
+        parts = [parts[0], "eq", parts[1]]
+    if len(parts) != 3 or not parts[0] or parts[1] not in FILTER_OPS:
+        raise ValueError(f"Invalid filter '{expression}', expected field:op:value with op in {FILTER_OPS}")
+    return parts[0], parts[1], parts[2]
+
+
+def _filter_condition(name: str, op: str, value: str):
+    condition = [DocumentField.result_id == DocumentText.result_id, DocumentField.name == name]
+    if op == "eq":
+        condition.append(DocumentField.text_value == value.strip().casefold())
+    elif op == "contains":
+        condition.append(DocumentField.text_value.contains(value.strip().casefold(), autoescape=True))
+    else:
+        number = parse_number(value)
+        bound = number if number is not None else parse_date(value)
+        if bound is None:
+            raise ValueError(f"Filter value '{value}' for {op} must be a number or YYYY-MM-DD date")
+        target = DocumentField.num_value if number is not None else DocumentField.date_value
+        comparisons = {"gt": target > bound, "gte": target >= bound, "lt": target < bound, "lte": target <= bound}
+        condition.append(comparisons[op])
+    return exists().where(and_(*condition))
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input can't use FTS5 query syntax
+    return " ".join(f'"{token}"' for token in _FTS5_TOKEN_RE.findall(q))
+
+
+def search_documents(
+    db: Session,
+    q: Optional[str] = None,
+    job_ids: Optional[List[int]] = None,
+    filters: Optional[List[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    limit = max(1, min(limit, MAX_LIMIT))
+    dialect = db.get_bind().dialect.name
+
+    query = select(
+        DocumentText.result_id, Result.job_id, Result.pdf_id, Result.extracted_fields, Result.errors
+    ).join(Result, Result.id == DocumentText.result_id)
+    rank = None
+
+    if q and q.strip():
+        if dialect == "postgresql":
+            # Must stay textually identical to the GIN index expression
+            vector = literal_column(f"({DOCUMENT_TSVECTOR})")
+            tsquery = func.websearch_to_tsquery(literal_column("'english'"), q)
+            query = query.where(vector.op("@@")(tsquery))
+            rank = func.ts_rank(vector, tsquery)
+            query = query.add_columns(rank.label("rank")).order_by(rank.desc(), DocumentText.result_id.desc())
+        elif dialect == "sqlite":
+            match = _fts5_query(q)
+            if not match:
+                return {"results": [], "limit": limit, "offset": offset, "has_more": False}
+            fts = table("document_texts_fts", column("rowid"))
+            query = query.join(fts, fts.c.rowid == DocumentText.id).where(
+                sql_text("document_texts_fts MATCH :match").bindparams(match=match)
+            )
+            # bm25 is lower-is-better; negate so higher rank means more relevant everywhere
+            rank = literal_column("-bm25(document_texts_fts)")
+            query = query.add_columns(rank.label("rank")).order_by(rank.desc(), DocumentText.result_id.desc())
+        else:
+            query = query.where(DocumentText.text.contains(q, autoescape=True))
+
+    if rank is None:
+        query = query.order_by(DocumentText.result_id.desc())
+    if job_ids is not None:
+        query = query.where(DocumentText.job_id.in_(job_ids))
+    for expression in filters or []:
+        query = query.where(_filter_condition(*parse_filter(expression)))
+
+    # One extra row tells us whether there is another page without a COUNT(*)
+    rows = db.execute(query.limit(limit + 1).offset(offset)).all()
+    results = [
+        {
+            "result_id": row.result_id,
+            "job_id": row.job_id,
+            "pdf_id": row.pdf_id,
+            "extracted_fields": row.extracted_fields,
+            "errors": row.errors or [],
+            "rank": float(row.rank) if rank is not None else None,
+        }
+        for row in rows[:limit]
+    ]
+    return {"results": results, "limit": limit, "offset": offset, "has_more": len(rows) > limit}
+
+
+def reindex(db: Session, job_id: Optional[int] = None, batch_size: int = 500) -> int:
+    """Rebuild field rows and FTS entries for results (for backfills). Stored text is kept."""
+    from .models import Job
+    specs = {job.id: job.fields or {} for job in db.query(Job).all()}
+    query = db.query(Result).order_by(Result.id)
+    if job_id is not None:
+        query = query.filter(Result.job_id == job_id)
+    ids = [row.id for row in query.with_entities(Result.id)]
+    for start in range(0, len(ids), batch_size):
+        for result in db.query(Result).filter(Result.id.in_(ids[start:start + batch_size])).all():
+            index_document(db, result, None, specs.get(result.job_id, {}))
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(sql_text("INSERT INTO document_texts_fts(document_texts_fts) VALUES ('rebuild')"))
+        db.commit()
+    return len(ids)
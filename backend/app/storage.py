@@ -0,0 +1,113 @@
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional
+
+from .core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class StoredFile(NamedTuple):
+    key: str      # content hash (sha256 hex)
+    path: str     # local path workers can read
+    size: int
+    created: bool  # False when identical content was already stored
+
+
+class StorageBackend:
+    """Where uploaded documents live. Keys are content hashes, so identical uploads share one object."""
+
+    def save(self, stream: BinaryIO) -> StoredFile:
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> str:
+        """Filesystem path for OCR; object stores would fetch to a local cache here."""
+        raise NotImplementedError
+
+    def accel_redirect_path(self, path: str) -> Optional[str]:
+        """Internal nginx URI for X-Accel-Redirect, or None if nginx can't serve it."""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Content-addressed files under `root/objects/ab/cd/<sha256>`."""
+
+    def __init__(self, root: str, accel_prefix: str = "/protected-uploads/"):
+        self.root = os.path.abspath(root)
+        self.accel_prefix = accel_prefix.rstrip("/") + "/"
+        self._tmp_dir = os.path.join(self.root, "tmp")
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", key[:2], key[2:4], key)
+
+    def save(self, stream: BinaryIO) -> StoredFile:
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            key = digest.hexdigest()
+            path = self.local_path(key)
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+                return StoredFile(key, path, size, False)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            return StoredFile(key, path, size, True)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def accel_redirect_path(self, path: str) -> Optional[str]:
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        if relative.startswith(os.pardir):
+            return None
+        return self.accel_prefix + relative.replace(os.sep, "/")
+
+
+STORAGE_BACKENDS = {
+    "local": lambda: LocalStorage(settings.upload_dir, settings.storage_accel_prefix),
+}
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        if settings.storage_backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend '{settings.storage_backend}'")
+        _storage = STORAGE_BACKENDS[settings.storage_backend]()
+    return _storage
@@ -1,89 +1,105 @@
-import os
-import json
+import sys
+import time
 import asyncio
-from typing import Dict
-from celery import Celery
+from typing import Dict, List
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from google.generativeai import GenerativeModel
-import pytesseract
-import PyPDF2
-from pdf2image import convert_from_path
-from tempfile import NamedTemporaryFile
+from celery.exceptions import Retry
+from celery.utils.log import get_task_logger
 from .core.config import settings
-from .crud import create_pdf, create_result, create_task_log
+from .core.celery_app import celery_app as app, PROCESS_PDF_TASK, PRUNE_TASK_LOGS_TASK, REEXTRACT_FIELDS_TASK
+from .compiled_job import get_compiled_job
+from .response_parser import SOURCE_DEFAULT, SOURCE_MISSING, FieldMatcher, parse_response
+from .extraction import RasterOptions, extract_text_from_pdf
+from .crud import (
+    create_pdf,
+    create_result,
+    create_task_log,
+    get_pdf,
+    get_result,
+    parse_result_errors,
+    record_job_failure,
+    update_result_fields,
+)
+from .search import get_document_text, index_document
 from .schemas import ResultCreate
 from .core.websocket_manager import manager  # <-- WebSocket manager
 
-# Celery app
-app = Celery('tasks', broker=settings.redis_url, backend=settings.redis_url)
+logger = get_task_logger(__name__)
 
-# Gemini model - configure API key first
-import google.generativeai as genai_lib
-genai_lib.configure(api_key=settings.gemini_api_key)
-genai = GenerativeModel('gemini-2.5-flash')
+# Gemini model, created on first use so importing this module stays cheap
+_genai = None
 
-# Tesseract path
-pytesseract.pytesseract.tesseract_cmd = settings.tesseract_path
 
+def get_genai():
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai_lib
+        genai_lib.configure(api_key=settings.gemini_api_key)
+        _genai = genai_lib.GenerativeModel('gemini-2.5-flash')
+    return _genai
 
-@app.task(bind=True, max_retries=3, default_retry_delay=60)
-def process_pdf_task(self, pdf_path: str, job_id: int, db_url: str):
+
+@app.task(bind=True, name=PROCESS_PDF_TASK, max_retries=3, default_retry_delay=60)
+def process_pdf_task(self, pdf_path: str, job_id: int, db_url: str, pdf_id: int = None, tenant: str = None):
     engine = create_engine(db_url)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db: Session = SessionLocal()
 
     task_id = self.request.id
+    started = time.monotonic()
+    job = None
 
     try:
         # 1. Notify: Task queued
         asyncio.run(manager.send_status(task_id, "waiting", "Task queued in background"))
 
-        # 2. Notify: Starting OCR
+        # 2. Fetch job (its extraction options drive OCR)
+        from .models import Job
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            raise ValueError(f"Job with ID {job_id} not found")
+
+        # 3. Notify: Starting OCR
         asyncio.run(manager.send_status(task_id, "running", "Extracting text from PDF..."))
         create_task_log(db, task_id, "running", "Starting OCR")
 
-        text = extract_text_from_pdf(pdf_path)
+        text = extract_text_from_pdf(pdf_path, RasterOptions.from_dict(job.extraction_options))
         if not text.strip():
             raise ValueError("No text could be extracted from the PDF")
 
         asyncio.run(manager.send_status(task_id, "running", "Text extraction completed"))
         create_task_log(db, task_id, "running", "OCR finished")
 
-        # 3. Fetch job
-        from .models import Job
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if not job:
-            raise ValueError(f"Job with ID {job_id} not found")
-
         # 4. Notify: Calling Gemini
         asyncio.run(manager.send_status(task_id, "running", "Sending text to Gemini AI..."))
         create_task_log(db, task_id, "running", "Calling Gemini API")
 
-        # Format prompt
-        try:
-            prompt = job.prompt.format(text=text, fields=json.dumps(job.fields, ensure_ascii=False))
-        except KeyError as e:
-            raise ValueError(f"Invalid prompt template: missing placeholder {e}")
+        # Prompt template, field schema and validator are built once per job version
+        compiled = get_compiled_job(job)
+        prompt = compiled.render_prompt(text)
 
         # Call Gemini
-        response = genai.generate_content(prompt)
+        response = get_genai().generate_content(prompt)
         extracted_text = response.text.strip()
 
         asyncio.run(manager.send_status(task_id, "running", "AI extraction complete. Parsing response..."))
         create_task_log(db, task_id, "running", "Gemini response received")
 
         # 5. Parse response
-        extracted_dict = parse_gemini_response(extracted_text, job.fields)
+        parsed = parse_response(extracted_text, compiled.matcher)
+        extracted_dict = parsed.fields
 
         # 6. Validate
         asyncio.run(manager.send_status(task_id, "running", "Validating extracted data..."))
-        errors = validate_fields(extracted_dict, job.fields)
+        errors = compiled.validator.validate(extracted_dict)
 
-        # 7. Save PDF record (if not already saved during upload)
-        from .schemas import PDFUpload
-        pdf_record = create_pdf(db, PDFUpload(job_id=job_id, file_path=pdf_path))
+        # 7. Reuse the PDF record saved during upload (it carries the storage key and filename)
+        pdf_record = get_pdf(db, pdf_id) if pdf_id is not None else None
+        if pdf_record is None:
+            from .schemas import PDFUpload
+            pdf_record = create_pdf(db, PDFUpload(job_id=job_id, file_path=pdf_path))
 
         # 8. Save result
         result_data = ResultCreate(
@@ -92,12 +108,18 @@ def process_pdf_task(self, pdf_path: str, job_id: int, db_url: str):
             extracted_fields=extracted_dict,
             errors=[f"{field}: {msg}" for field, msg in errors.items()]
         )
-        result = create_result(db, result_data)
+        result = create_result(
+            db, result_data, field_errors=errors, processing_ms=int((time.monotonic() - started) * 1000)
+        )
+        index_search(db, task_id, result, text, compiled.fields)
+        if errors:
+            schedule_reextraction(result, db_url, tenant)
 
         # 9. Notify: Success
         result_payload = {
             "extracted": extracted_dict,
-            "errors": list(errors.values())
+            "errors": list(errors.values()),
+            "sources": parsed.sources
         }
         asyncio.run(manager.send_status(task_id, "finished", "Processing completed", result_payload))
         create_task_log(db, task_id, "finished", f"Result ID: {result.id}")
@@ -105,7 +127,8 @@ def process_pdf_task(self, pdf_path: str, job_id: int, db_url: str):
         return {
             "result_id": result.id,
             "pdf_id": pdf_record.id,
-            "errors": list(errors.keys())
+            "errors": list(errors.keys()),
+            "sources": parsed.sources
         }
 
     except Exception as e:
@@ -118,85 +141,129 @@ def process_pdf_task(self, pdf_path: str, job_id: int, db_url: str):
             raise self.retry(exc=e, countdown=60)
 
         # Don't retry on validation/logic errors
+        if job is not None:
+            try:
+                db.rollback()
+                record_job_failure(db, job_id, int((time.monotonic() - started) * 1000))
+            except Exception:
+                db.rollback()
         return {"error": error_msg}
 
     finally:
         db.close()
+        # A retry runs under the same task id and keeps the tenant's slot until it finishes
+        if tenant and not isinstance(sys.exc_info()[1], Retry):
+            from .scheduling import get_scheduler
+            get_scheduler().release(tenant, task_id)
+
+
+def index_search(db: Session, task_id: str, result, text, fields: Dict):
+    """Best effort: the result is already saved, and `python -m app.cli reindex-search` can backfill."""
+    try:
+        index_document(db, result, text, fields)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Search indexing failed for result %s", result.id)
+        create_task_log(db, task_id, "running", f"Search indexing failed: {e}")
 
 
-# === HELPER FUNCTIONS ===
+def schedule_reextraction(result, db_url: str, tenant: str = None) -> bool:
+    """Queue an automatic follow-up for a result's failed fields, within the attempt limit.
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from PDF using PyPDF2 + OCR fallback via Tesseract."""
-    text = ""
+    Follow-ups go through the fair-share scheduler at bulk priority, under the
+    tenant that processed the document.
+    """
+    if (result.reextract_attempts or 0) >= settings.reextract_max_attempts:
+        return False
+    from .scheduling import BULK, submit_task
+    try:
+        submit_task(
+            REEXTRACT_FIELDS_TASK, [result.id, db_url, None, True], tenant or f"job:{result.job_id}", BULK
+        )
+    except Exception:
+        # Best effort: the result is already saved and can still be re-extracted manually
+        return False
+    return True
 
-    with open(pdf_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        num_pages = len(pdf_reader.pages)
 
-        for page_num, page in enumerate(pdf_reader.pages, start=1):
-            # Try native extraction
-            page_text = page.extract_text()
-            if page_text and page_text.strip():
-                text += page_text + "\n"
-                continue
+@app.task(bind=True, name=REEXTRACT_FIELDS_TASK, max_retries=3, default_retry_delay=60)
+def reextract_fields_task(
+    self, result_id: int, db_url: str, fields: List[str] = None, automatic: bool = False, tenant: str = None
+):
+    """Ask the model again for only the fields that failed validation and merge them into the result.
+
+    Reuses the document text stored at processing time, so neither OCR nor
+    the full extraction prompt is repeated.
+    """
+    engine = create_engine(db_url)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db: Session = SessionLocal()
+    task_id = self.request.id
 
-            # Fallback: OCR
-            try:
-                images = convert_from_path(
-                    pdf_path,
-                    dpi=200,
-                    first_page=page_num,
-                    last_page=page_num,
-                    fmt='png'
-                )
-                if images:
-                    ocr_text = pytesseract.image_to_string(images[0], lang='eng')
-                    text += ocr_text + "\n"
-            except Exception as ocr_err:
-                text += f"[OCR failed on page {page_num}: {ocr_err}]\n"
-
-    return text.strip()
-
-
-def parse_gemini_response(response: str, fields: Dict) -> Dict:
-    """Parse Gemini response as JSON. Fallback to field-wise extraction if invalid."""
     try:
-        data = json.loads(response)
-        if not isinstance(data, dict):
-            raise ValueError("Response is not a JSON object")
-        return data
-    except json.JSONDecodeError:
-        # Fallback: try to extract known fields using regex or split
-        result = {}
-        lines = [line.strip() for line in response.split('\n') if ':' in line]
-        for line in lines:
-            for field in fields.keys():
-                if field.lower() in line.lower():
-                    value = line.split(':', 1)[1].strip().strip('"\'')
-                    result[field] = value
-        return result or {k: "N/A" for k in fields.keys()}
-
-
-def validate_fields(extracted: Dict, expected: Dict) -> Dict:
-    """Validate extracted fields against job schema."""
-    errors = {}
-    for field, spec in expected.items():
-        value = extracted.get(field)
-
-        if spec.get("required") and (value is None or str(value).strip() == ""):
-            errors[field] = "Missing or empty value"
-
-        if value and spec.get("type") == "int":
-            try:
-                int(value)
-            except (ValueError, TypeError):
-                errors[field] = "Must be a valid integer"
+        result = get_result(db, result_id)
+        if not result:
+            raise ValueError(f"Result with ID {result_id} not found")
+        if automatic and (result.reextract_attempts or 0) >= settings.reextract_max_attempts:
+            return {"result_id": result_id, "skipped": "attempt limit reached"}
+
+        failed = parse_result_errors(result.errors)
+        if fields:
+            failed = {f: msg for f, msg in failed.items() if f in fields}
+        if not failed:
+            return {"result_id": result_id, "skipped": "no failed fields"}
+
+        from .models import Job
+        job = db.query(Job).filter(Job.id == result.job_id).first()
+        compiled = get_compiled_job(job)
+        create_task_log(db, task_id, "running", f"Re-extracting {', '.join(failed)} for result {result_id}")
+
+        text = get_document_text(db, result_id)
+        if text is None:
+            # Processed before document text was stored
+            pdf = get_pdf(db, result.pdf_id)
+            text = extract_text_from_pdf(pdf.file_path, RasterOptions.from_dict(job.extraction_options))
+            index_document(db, result, text, compiled.fields)
+
+        prompt = compiled.render_reextract_prompt(text, failed, result.extracted_fields or {})
+        response = get_genai().generate_content(prompt)
+        parsed = parse_response(response.text.strip(), FieldMatcher(failed.keys()))
+
+        new_values = {
+            field: parsed.fields[field]
+            for field in failed
+            if parsed.sources[field] not in (SOURCE_MISSING, SOURCE_DEFAULT)
+        }
+        result = update_result_fields(db, result_id, new_values, compiled.validator.validate)
+        errors = parse_result_errors(result.errors)
+        index_search(db, task_id, result, None, compiled.fields)
+        create_task_log(db, task_id, "finished", f"Result ID: {result_id}, {len(errors)} field error(s) left")
+
+        if errors and automatic:
+            schedule_reextraction(result, db_url, tenant)
+        return {
+            "result_id": result_id,
+            "fixed": sorted(set(failed) - set(errors)),
+            "errors": list(errors.keys()),
+            "sources": {field: parsed.sources[field] for field in failed},
+        }
+
+    except Exception as e:
+        db.rollback()
+        create_task_log(db, task_id, "failed", str(e))
+        if isinstance(e, (ConnectionError, TimeoutError)):
+            raise self.retry(exc=e, countdown=60)
+        return {"error": str(e)}
+
+    finally:
+        db.close()
+        if tenant and not isinstance(sys.exc_info()[1], Retry):
+            from .scheduling import get_scheduler
+            get_scheduler().release(tenant, task_id)
 
-        if value and spec.get("type") == "date":
-            # Accept YYYY-MM-DD or similar
-            import re
-            if not re.match(r"\d{4}-\d{2}-\d{2}", str(value)):
-                errors[field] = "Invalid date format"
 
-    return errors
\ No newline at end of file
+@app.task(name=PRUNE_TASK_LOGS_TASK)
+def prune_task_logs():
+    from .core.database import engine
+    from .retention import run_retention
+    return run_retention(engine)
@@ -0,0 +1,71 @@
+"""OCR throughput per backend on the same rasterized fixture pages.
+
+Pages are rasterized once up front so only OCR is timed. Run from the
+backend directory:
+
+    python -m benchmarks.bench_ocr_backends [../uploads/sample-invoice.pdf ...] --rounds 3
+
+Without arguments it runs on benchmarks/fixtures/invoice.pdf, the page
+tests/test_ocr.py checks backend parity on. tesserocr is optional:
+`pip install -r requirements-ocr.txt`.
+"""
+import argparse
+import os
+import time
+
+from app.extraction import RasterOptions, page_dpi, rasterize_page
+from app.ocr import OCR_BACKENDS
+from app.pdf_backends import get_pdf_backend
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "invoice.pdf")
+
+
+def load_pages(pdf_paths, options):
+    pages = []
+    for pdf_path in pdf_paths:
+        with get_pdf_backend().open(pdf_path) as document:
+            for page_num in range(1, document.page_count + 1):
+                dpi = page_dpi(*document.page_size(page_num), options)
+                pages.append((rasterize_page(pdf_path, page_num, dpi, options, document), dpi))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="*", default=[FIXTURE])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--backends", default=",".join(OCR_BACKENDS))
+    args = parser.parse_args()
+
+    options = RasterOptions()
+    pages = load_pages(args.pdfs, options)
+    print(f"{len(pages)} pages x {args.rounds} rounds")
+
+    reference = None
+    for name in args.backends.split(","):
+        try:
+            backend = OCR_BACKENDS[name]()
+        except ImportError as e:
+            print(f"{name:>12}: skipped ({e})")
+            continue
+        # Warm-up call so one-off model loading is reported separately
+        start = time.perf_counter()
+        outputs = [backend.image_to_string(pages[0][0], lang=options.lang, dpi=pages[0][1])]
+        warmup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            outputs = [backend.image_to_string(image, lang=options.lang, dpi=dpi) for image, dpi in pages]
+        elapsed = time.perf_counter() - start
+
+        words = [o.split() for o in outputs]
+        if reference is None:
+            reference = words
+        parity = sum(a == b for a, b in zip(words, reference)) / len(pages)
+        print(f"{name:>12}: {len(pages) * args.rounds / elapsed:6.2f} pages/s, "
+              f"first call {warmup:.2f}s, identical pages vs first backend {parity:.0%}")
+
+
+if __name__ == "__main__":
+    main()
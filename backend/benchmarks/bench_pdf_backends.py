@@ -0,0 +1,91 @@
+"""Text layer throughput and fidelity per PDF backend.
+
+Only native text extraction is timed; pages are not OCR'd. Fidelity is the
+word-level similarity to a ground-truth `<name>.txt` next to the PDF when one
+exists, otherwise to the first backend's output. Also reports how many pages
+each backend would send to OCR, and with --render the cost of rasterizing
+those pages (in-process where the backend supports it, pdftoppm otherwise).
+Run from the backend directory:
+
+    python -m benchmarks.bench_pdf_backends ../uploads/*.pdf --rounds 3 [--render]
+"""
+import argparse
+import difflib
+import os
+import time
+
+from app.extraction import RasterOptions, page_dpi, rasterize_page, text_layer_usable
+from app.pdf_backends import PDF_BACKENDS
+
+
+def similarity(text, reference):
+    return difflib.SequenceMatcher(None, text.split(), reference.split(), autojunk=False).ratio()
+
+
+def extract(backend, pdf_path):
+    with backend.open(pdf_path) as document:
+        return [document.page_text(n) for n in range(1, document.page_count + 1)]
+
+
+def ground_truth(pdf_path):
+    txt_path = os.path.splitext(pdf_path)[0] + ".txt"
+    if os.path.exists(txt_path):
+        with open(txt_path, encoding="utf-8") as f:
+            return f.read()
+    return None
+
+
+def render_seconds(backend, pdf_path, pages, options):
+    start = time.perf_counter()
+    with backend.open(pdf_path) as document:
+        for n in pages:
+            dpi = page_dpi(*document.page_size(n), options)
+            rasterize_page(pdf_path, n, dpi, options, document)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--backends", default=",".join(PDF_BACKENDS))
+    parser.add_argument("--render", action="store_true", help="also time rasterizing the pages sent to OCR")
+    args = parser.parse_args()
+
+    options = RasterOptions()
+    reference = None
+    for name in args.backends.split(","):
+        try:
+            backend = PDF_BACKENDS[name]()
+        except ImportError as e:
+            print(f"{name:>10}: skipped ({e})")
+            continue
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            texts = {pdf_path: extract(backend, pdf_path) for pdf_path in args.pdfs}
+        elapsed = time.perf_counter() - start
+        page_count = sum(len(pages) for pages in texts.values())
+
+        if reference is None:
+            reference = {pdf_path: "\n".join(pages) for pdf_path, pages in texts.items()}
+        scores = []
+        for pdf_path, pages in texts.items():
+            truth = ground_truth(pdf_path) or reference[pdf_path]
+            scores.append(similarity("\n".join(pages), truth))
+        ocr_pages = {
+            pdf_path: [n for n, text in enumerate(pages, start=1) if not text_layer_usable(text)]
+            for pdf_path, pages in texts.items()
+        }
+        ocr_count = sum(len(pages) for pages in ocr_pages.values())
+
+        line = (f"{name:>10}: {page_count * args.rounds / elapsed:8.1f} pages/s, "
+                f"fidelity {sum(scores) / len(scores):.1%}, {ocr_count}/{page_count} pages to OCR")
+        if args.render and ocr_count:
+            seconds = sum(render_seconds(backend, p, pages, options) for p, pages in ocr_pages.items() if pages)
+            line += f", {ocr_count / seconds:.2f} OCR pages rendered/s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare OCR time, image size and accuracy: fixed 200 DPI colour PNG vs adaptive rasterization.
+
+Every page is forced through OCR. Accuracy is the word-level similarity to the
+page's native text layer when it has one, otherwise to the legacy OCR output.
+Run from the backend directory (needs poppler and tesseract installed):
+
+    python -m benchmarks.bench_rasterization ../uploads/sample-invoice.pdf [more.pdf ...]
+    python -m benchmarks.bench_rasterization big.pdf --options '{"color_mode": "bilevel", "pixel_budget": 3000000}'
+"""
+import argparse
+import difflib
+import json
+import time
+
+import pytesseract
+from pdf2image import convert_from_path
+
+from app.extraction import RasterOptions, page_dpi, rasterize_page
+from app.pdf_backends import get_pdf_backend
+
+
+def legacy_page(pdf_path, page_num):
+    images = convert_from_path(pdf_path, dpi=200, first_page=page_num, last_page=page_num, fmt='png')
+    return images[0], 200
+
+
+def adaptive_page(pdf_path, page_num, document, options):
+    dpi = page_dpi(*document.page_size(page_num), options)
+    return rasterize_page(pdf_path, page_num, dpi, options, document), dpi
+
+
+def similarity(text, reference):
+    return difflib.SequenceMatcher(None, text.split(), reference.split(), autojunk=False).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--options", default="{}", help="JSON RasterOptions overrides")
+    args = parser.parse_args()
+    options = RasterOptions.from_dict(json.loads(args.options))
+
+    totals = {"legacy": [0.0, 0, 0.0], "adaptive": [0.0, 0, 0.0]}  # seconds, pixels, accuracy sum
+    pages = 0
+    for pdf_path in args.pdfs:
+        with get_pdf_backend().open(pdf_path) as document:
+            for page_num in range(1, document.page_count + 1):
+                native = document.page_text(page_num).strip()
+                reference = None
+                row = []
+                for name in ("legacy", "adaptive"):
+                    start = time.perf_counter()
+                    if name == "legacy":
+                        image, dpi = legacy_page(pdf_path, page_num)
+                        text = pytesseract.image_to_string(image, lang="eng")
+                    else:
+                        image, dpi = adaptive_page(pdf_path, page_num, document, options)
+                        text = pytesseract.image_to_string(image, lang=options.lang, config=f"--dpi {dpi}")
+                    elapsed = time.perf_counter() - start
+                    if reference is None:
+                        reference = native or text
+                    accuracy = similarity(text, reference)
+                    pixels = image.width * image.height
+                    totals[name][0] += elapsed
+                    totals[name][1] += pixels
+                    totals[name][2] += accuracy
+                    row.append(f"{name} {dpi:>3}dpi {image.mode:<3} {pixels / 1e6:5.1f}Mpx {elapsed:6.2f}s acc={accuracy:.3f}")
+                pages += 1
+                print(f"{pdf_path} p{page_num}: " + " | ".join(row))
+
+    print()
+    for name, (seconds, pixels, accuracy) in totals.items():
+        print(f"{name:>8}: {seconds:7.2f}s total, {seconds / pages:5.2f}s/page, "
+              f"{pixels / pages / 1e6:5.1f}Mpx/page, mean accuracy {accuracy / pages:.3f}")
+
+
+if __name__ == "__main__":
+    main()
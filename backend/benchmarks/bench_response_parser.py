@@ -0,0 +1,84 @@
+"""Benchmark the Gemini response parser against the previous line-scan parser.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_response_parser [--repeat 2000]
+"""
+import argparse
+import json
+import os
+import time
+
+from app.response_parser import FieldMatcher, parse_response
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "malformed_responses.json")
+
+
+def legacy_parse(response, fields):
+    try:
+        data = json.loads(response)
+        if not isinstance(data, dict):
+            raise ValueError("Response is not a JSON object")
+        return data
+    except json.JSONDecodeError:
+        result = {}
+        lines = [line.strip() for line in response.split('\n') if ':' in line]
+        for line in lines:
+            for field in fields:
+                if field.lower() in line.lower():
+                    value = line.split(':', 1)[1].strip().strip('"\'')
+                    result[field] = value
+        return result or {k: "N/A" for k in fields}
+
+
+def recovered(parsed, fields):
+    return sum(1 for f in fields if parsed.get(f) not in (None, "", "N/A"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--fields", type=int, default=0,
+                        help="pad the field list with synthetic names to this size")
+    args = parser.parse_args()
+
+    with open(CORPUS) as f:
+        corpus = json.load(f)
+    fields = list(corpus["fields"])
+    fields += [f"extra_field_{i}" for i in range(max(0, args.fields - len(fields)))]
+    responses = corpus["responses"]
+    field_spec = {f: {} for f in fields}
+
+    def run_legacy():
+        out = []
+        for r in responses:
+            try:
+                out.append(legacy_parse(r, fields))
+            except ValueError:
+                out.append({})
+        return out
+
+    matcher = FieldMatcher(fields)
+
+    def run_new():
+        return [parse_response(r, matcher).fields for r in responses]
+
+    for name, fn in (("legacy", run_legacy), ("indexed", run_new)):
+        results = fn()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            fn()
+        elapsed = time.perf_counter() - start
+        per_doc_us = elapsed / (args.repeat * len(responses)) * 1e6
+        total = sum(recovered(r, corpus["fields"]) for r in results)
+        print(f"{name:>8}: {per_doc_us:8.1f} us/response, "
+              f"{total}/{len(responses) * len(corpus['fields'])} field values recovered")
+
+    build_start = time.perf_counter()
+    for _ in range(100):
+        FieldMatcher(field_spec.keys())
+    print(f" matcher build: {(time.perf_counter() - build_start) / 100 * 1e6:.1f} us (once per job version)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cold import time and peak RSS of the API and worker entry points.
+
+Each target is imported in a fresh interpreter. Run from the backend directory:
+
+    python -m benchmarks.bench_startup [--repeat 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+for name in sys.argv[1].split(","):
+    __import__(name)
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("google.generativeai", "pytesseract", "PyPDF2", "pdf2image", "tesserocr") if m in sys.modules]
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_kb / 1024, "heavy": heavy}))
+"""
+
+TARGETS = [
+    ("api (app.main)", "app.main"),
+    ("worker boot (app.tasks)", "app.tasks"),
+    ("worker first task (OCR + LLM stack)", "app.tasks,PyPDF2,pdf2image,pytesseract,google.generativeai"),
+]
+
+
+def measure(modules):
+    out = subprocess.run([sys.executable, "-c", PROBE, modules], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, modules in TARGETS:
+        try:
+            runs = [measure(modules) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"{label:<38} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        seconds = statistics.median(r["seconds"] for r in runs)
+        rss = statistics.median(r["rss_mb"] for r in runs)
+        heavy = ", ".join(runs[0]["heavy"]) or "none"
+        print(f"{label:<38} import {seconds * 1000:7.1f} ms  peak RSS {rss:6.1f} MB  heavy modules loaded: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import os
 os.environ.setdefault('FORKED_BY_MULTIPROCESSING', '1')
 
-from app.tasks import app as celery_app
+from app.core.celery_app import celery_app
+import app.tasks  # noqa: F401  (registers tasks)
 
 __all__ = ('celery_app',)
 
 # This ensures that the 'FORKED_BY_MULTIPROCESSING' environment variable is set
-# before any multiprocessing operations are initiated by Celery workers.
\ No newline at end of file
+# before any multiprocessing operations are initiated by Celery workers.
@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import init_db
+from app.models import Job
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def db(db_url):
+    """Session on a fresh SQLite database with all tables created."""
+    engine = create_engine(db_url)
+    init_db(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def make_job(db):
+    def make(fields, title="Invoices", prompt="{text}"):
+        job = Job(title=title, prompt=prompt, fields=fields, assigned_emails=[])
+        db.add(job)
+        db.commit()
+        return job
+    return make
@@ -0,0 +1,61 @@
+import pytest
+from types import SimpleNamespace
+from app.compiled_job import CompiledJob, FieldValidator, PromptTemplate, get_compiled_job, clear_compiled_jobs
+
+
+def test_prompt_template_matches_str_format():
+    template = "Extract {fields} from this text: {text}\n{{literal}}"
+    rendered = PromptTemplate(template).render(text="hello", fields='{"a": 1}')
+    assert rendered == template.format(text="hello", fields='{"a": 1}')
+
+
+def test_prompt_template_rejects_unknown_placeholder():
+    with pytest.raises(ValueError):
+        PromptTemplate("Extract {fields} from {document}")
+
+
+def test_validator_extended_types():
+    validator = FieldValidator({
+        "count": {"type": "int", "required": True},
+        "total": {"type": "decimal"},
+        "rate": {"type": "float"},
+        "due": {"type": "date", "format": "%d/%m/%Y"},
+        "currency": {"type": "enum", "values": ["USD", "EUR"]},
+        "invoice": {"type": "regex", "pattern": r"INV-\d+"},
+    })
+    ok = {"count": "3", "total": "10.50", "rate": "0.2", "due": "31/12/2024", "currency": "usd", "invoice": "INV-42"}
+    bad = {"total": "ten", "rate": "x", "due": "2024-12-31", "currency": "GBP", "invoice": "42"}
+
+    results = validator.validate_many([ok, bad])
+    assert results[0] == {}
+    assert set(results[1]) == {"count", "total", "rate", "due", "currency", "invoice"}
+    assert results[1]["count"] == "Missing or empty value"
+
+
+def test_validator_keeps_legacy_date_check():
+    validator = FieldValidator({"date": {"type": "date"}})
+    assert validator.validate({"date": "2024-01-31"}) == {}
+    assert validator.validate({"date": "31/01/2024"}) == {"date": "Invalid date format"}
+
+
+def test_compiled_job_cached_per_version():
+    clear_compiled_jobs()
+    job = SimpleNamespace(id=1, created_at="2024-01-01", updated_at=None, prompt="{text}", fields={"a": {}})
+    first = get_compiled_job(job)
+    assert get_compiled_job(job) is first
+
+    job.updated_at = "2024-01-01"
+    job.prompt = "New: {text}"
+    second = get_compiled_job(job)
+    assert second is not first
+    assert isinstance(second, CompiledJob)
+    assert second.render_prompt("x") == "New: x"
+
+
+def test_compiled_job_not_reused_for_recycled_id():
+    clear_compiled_jobs()
+    old = SimpleNamespace(id=1, created_at="2024-01-01", updated_at=None, prompt="Old: {text}", fields={})
+    get_compiled_job(old)
+
+    new = SimpleNamespace(id=1, created_at="2024-02-01", updated_at=None, prompt="New: {text}", fields={})
+    assert get_compiled_job(new).render_prompt("x") == "New: x"
@@ -0,0 +1,28 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.database import init_db
+
+
+def test_init_db_adds_new_columns_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # jobs as created before extraction_options existed
+        conn.execute(text(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, "
+            "prompt TEXT NOT NULL, fields JSON NOT NULL, assigned_emails JSON, status VARCHAR, "
+            "created_at DATETIME, updated_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO jobs (title, prompt, fields, assigned_emails) VALUES ('Old', '{text}', '{}', '[]')"))
+        # pdfs as created before content-addressed storage
+        conn.execute(text("CREATE TABLE pdfs (id INTEGER PRIMARY KEY, job_id INTEGER NOT NULL, "
+                          "file_path VARCHAR NOT NULL, uploaded_at DATETIME, status VARCHAR)"))
+
+    init_db(engine)
+    init_db(engine)  # idempotent
+
+    columns = {c["name"] for c in inspect(engine).get_columns("jobs")}
+    assert "extraction_options" in columns
+    assert {"content_hash", "original_filename"} <= {c["name"] for c in inspect(engine).get_columns("pdfs")}
+    assert "ix_pdfs_content_hash" in {i["name"] for i in inspect(engine).get_indexes("pdfs")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT title, extraction_options FROM jobs")).one() == ("Old", None)
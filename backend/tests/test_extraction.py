@@ -0,0 +1,105 @@
+import pytest
+from PIL import Image
+from app.extraction import RasterOptions, extract_text_from_pdf, page_dpi, rasterize_page, text_layer_usable
+
+A4 = (595, 842)
+A3 = (842, 1191)
+RECEIPT = (226, 500)
+
+
+def test_page_dpi_scales_with_page_size():
+    options = RasterOptions(pixel_budget=4_000_000, min_dpi=100, max_dpi=300)
+    assert 190 <= page_dpi(*A4, options) <= 210
+    assert page_dpi(*A3, options) < page_dpi(*A4, options)
+    assert page_dpi(*RECEIPT, options) == 300
+
+
+def test_page_dpi_clamped_to_range():
+    options = RasterOptions(pixel_budget=1_000, min_dpi=120, max_dpi=300)
+    assert page_dpi(*A3, options) == 120
+
+
+def test_raster_options_from_job():
+    options = RasterOptions.from_dict({"color_mode": "bilevel", "deskew": True, "unknown": 1})
+    assert options.color_mode == "bilevel"
+    assert options.deskew is True
+    assert RasterOptions.from_dict(None) == RasterOptions()
+    with pytest.raises(ValueError):
+        RasterOptions.from_dict({"color_mode": "sepia"})
+
+
+@pytest.mark.parametrize("options", [
+    {"pixel_budget": "4000000"},
+    {"pixel_budget": -1},
+    {"pixel_budget": True},
+    {"deskew": "yes"},
+    {"bilevel_threshold": 300},
+])
+def test_raster_options_rejects_bad_values(options):
+    with pytest.raises(ValueError):
+        RasterOptions.from_dict(options)
+
+
+def _pdf_with_text(path, lines):
+    """Write a one-page PDF with a Helvetica text layer."""
+    stream = "BT /F1 12 Tf 72 720 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    path.write_bytes(out.encode("latin-1"))
+    return str(path)
+
+
+def test_text_layer_usable():
+    assert text_layer_usable("Invoice 10042\nTotal due: 1,250.00 USD")
+    assert not text_layer_usable("  \n ")
+    assert not text_layer_usable("(cid:12)(cid:7)(cid:44) Total")
+    assert not text_layer_usable("Inv\ufffd\ufffdice \ufffd\ufffd\ufffd")
+    assert not text_layer_usable("\ue001\ue002\ue003 12")
+    assert not text_layer_usable("-- .. ;; ** // 1")
+
+
+@pytest.mark.parametrize("backend", ["pypdf2", "pypdfium2"])
+def test_native_text_layer(tmp_path, backend):
+    pytest.importorskip({"pypdf2": "PyPDF2", "pypdfium2": "pypdfium2"}[backend])
+    pdf_path = _pdf_with_text(tmp_path / "invoice.pdf", ["Invoice 10042", "Total due: 1,250.00 USD"])
+    text = extract_text_from_pdf(pdf_path, backend=backend)
+    assert "Invoice 10042" in text
+    assert "1,250.00" in text
+
+
+def test_ocr_timeout_fails_extraction(mocker):
+    document = mocker.MagicMock(page_count=1)
+    document.__enter__.return_value = document
+    document.page_text.return_value = ""
+    document.page_size.return_value = (595, 842)
+    document.render.return_value = Image.new("L", (10, 10), 255)
+    mocker.patch("app.extraction.get_pdf_backend").return_value.open.return_value = document
+    ocr = mocker.patch("app.extraction.get_ocr_backend").return_value
+    ocr.image_to_string.side_effect = TimeoutError("No tesserocr handle")
+
+    # Must reach the task (which retries) instead of becoming "[OCR failed ...]" text
+    with pytest.raises(TimeoutError):
+        extract_text_from_pdf("scan.pdf")
+
+
+@pytest.mark.parametrize("options", [RasterOptions(), RasterOptions(color_mode="bilevel", crop_margins=True)])
+def test_rasterized_pages_skip_png_encoding(mocker, options):
+    document = mocker.Mock()
+    document.render.return_value = Image.new("L", (100, 100), 255)
+    image = rasterize_page("scan.pdf", 1, 150, options, document)
+    assert image.format == "PPM"
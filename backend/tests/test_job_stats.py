@@ -0,0 +1,48 @@
+import pytest
+
+from app.crud import create_result, get_job_stats, rebuild_job_stats, record_job_failure
+from app.models import PDF
+from app.schemas import ResultCreate
+
+
+@pytest.fixture
+def job(make_job):
+    return make_job({"total": {}, "date": {}})
+
+
+@pytest.fixture
+def pdf(db, job):
+    pdf = PDF(job_id=job.id, file_path="x.pdf")
+    db.add(pdf)
+    db.commit()
+    return pdf
+
+
+def _save(db, job, pdf, errors, ms):
+    create_result(db, ResultCreate(
+        job_id=job.id,
+        pdf_id=pdf.id,
+        extracted_fields={},
+        errors=[f"{field}: {msg}" for field, msg in errors.items()],
+    ), field_errors=errors, processing_ms=ms)
+
+
+def test_stats_maintained_with_results(db, job, pdf):
+    _save(db, job, pdf, {}, 100)
+    _save(db, job, pdf, {"total": "Missing or empty value", "date": "Invalid date format"}, 300)
+    _save(db, job, pdf, {"date": "Invalid date format"}, 200)
+    record_job_failure(db, job.id, 400)
+
+    stats = get_job_stats(db, job.id)
+    assert stats["documents_processed"] == 3
+    assert stats["documents_with_errors"] == 2
+    assert stats["documents_failed"] == 1
+    assert stats["failure_rate"] == 0.25
+    assert stats["avg_processing_ms"] == 250
+    assert stats["fields"] == {"total": {"missing": 1, "invalid": 0}, "date": {"missing": 0, "invalid": 2}}
+
+    rebuild_job_stats(db, job.id)
+    rebuilt = get_job_stats(db, job.id)
+    stats.pop("updated_at")
+    rebuilt.pop("updated_at")
+    assert rebuilt == stats
@@ -0,0 +1,76 @@
+import os
+import re
+import shutil
+import sys
+import pytest
+from PIL import Image
+
+# Same page bench_ocr_backends runs on by default
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "invoice.pdf")
+
+
+def _fixture_page():
+    if shutil.which("pdftoppm") is None:
+        pytest.skip("poppler (pdftoppm) not installed")
+    from app.extraction import RasterOptions, page_dpi, rasterize_page
+    options = RasterOptions()
+    dpi = page_dpi(612, 792, options)
+    return rasterize_page(FIXTURE, 1, dpi, options), dpi
+
+
+def _page():
+    return Image.new("L", (200, 100), 255)
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def test_tesserocr_matches_pytesseract():
+    pytest.importorskip("pytesseract")
+    pytest.importorskip("tesserocr")
+    from app.ocr import PytesseractBackend, TesserocrBackend
+
+    page, dpi = _fixture_page()
+    expected = PytesseractBackend().image_to_string(page, dpi=dpi)
+    backend = TesserocrBackend(pool_size=1)
+    # Same handle reused across calls must give the same answer
+    first = backend.image_to_string(page, dpi=dpi)
+    second = backend.image_to_string(page, dpi=dpi)
+
+    assert _words(first) == _words(expected)
+    assert _words(second) == _words(first)
+    assert "acme" in _words(first)
+
+
+def test_unknown_backend_rejected():
+    from app.ocr import get_ocr_backend
+    with pytest.raises(ValueError):
+        get_ocr_backend("nope")
+
+
+def test_failed_handle_creation_does_not_leak_pool_slot(monkeypatch):
+    import types
+    from app.ocr import TesserocrBackend
+
+    class FakeAPI:
+        def __init__(self, lang, **kwargs):
+            if lang == "xyz":
+                raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+
+        def SetImage(self, image):
+            pass
+
+        def GetUTF8Text(self):
+            return "ok"
+
+        def Clear(self):
+            pass
+
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=FakeAPI))
+    backend = TesserocrBackend(pool_size=1)
+    for _ in range(2):
+        # Must raise again rather than wait forever for a handle that was never created
+        with pytest.raises(RuntimeError):
+            backend.image_to_string(_page(), lang="xyz")
+    assert backend.image_to_string(_page()) == "ok"
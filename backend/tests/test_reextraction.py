@@ -0,0 +1,110 @@
+import pytest
+
+from app.compiled_job import CompiledJob
+from app.crud import create_result, get_job_stats, get_result, update_result_fields
+from app.models import PDF
+from app.schemas import ResultCreate
+from app.search import index_document
+from app.tasks import reextract_fields_task
+
+FIELDS = {
+    "vendor": {"required": True},
+    "total": {"type": "float", "required": True},
+    "date": {"type": "date", "required": True},
+}
+
+
+@pytest.fixture
+def job(make_job):
+    return make_job(FIELDS, prompt="Extract {fields} from {text}")
+
+
+@pytest.fixture
+def result(db, job):
+    pdf = PDF(job_id=job.id, file_path="missing.pdf")
+    db.add(pdf)
+    db.commit()
+    errors = {"total": "Must be a valid number", "date": "Invalid date format"}
+    result = create_result(db, ResultCreate(
+        job_id=job.id,
+        pdf_id=pdf.id,
+        extracted_fields={"vendor": "Acme", "total": "one thousand", "date": "5 March"},
+        errors=[f"{field}: {msg}" for field, msg in errors.items()],
+    ), field_errors=errors, processing_ms=100)
+    index_document(db, result, "Acme Ltd invoice, dated 2024-03-05, total 1250.00", FIELDS)
+    return result
+
+
+def _mock_model(mocker, text):
+    model = mocker.Mock()
+    model.generate_content.return_value = mocker.Mock(text=text)
+    mocker.patch("app.tasks.get_genai", return_value=model)
+    return model
+
+
+def test_reextract_merges_only_failed_fields(db, db_url, job, result, mocker):
+    extract = mocker.patch("app.tasks.extract_text_from_pdf")
+    # The model also returns a vendor; it passed validation, so it must not change
+    model = _mock_model(mocker, '{"total": "1250.00", "date": "2024-03-05", "vendor": "Other"}')
+
+    outcome = reextract_fields_task.apply(args=[result.id, db_url]).get()
+
+    assert outcome["fixed"] == ["date", "total"] and outcome["errors"] == []
+    extract.assert_not_called()  # stored text reused, no OCR
+    prompt = model.generate_content.call_args[0][0]
+    assert "total" in prompt and "vendor" not in prompt.split("Document text:")[0]
+
+    db.expire_all()
+    updated = get_result(db, result.id)
+    assert updated.extracted_fields == {"vendor": "Acme", "total": "1250.00", "date": "2024-03-05"}
+    assert updated.errors == []
+    assert updated.reextract_attempts == 1
+
+    stats = get_job_stats(db, job.id)
+    assert stats["documents_with_errors"] == 0
+    assert stats["fields"]["total"]["invalid"] == 0
+
+
+def test_reextract_keeps_values_the_model_did_not_return(db, db_url, job, result, mocker):
+    _mock_model(mocker, '{"total": "1250.00"}')
+
+    outcome = reextract_fields_task.apply(args=[result.id, db_url]).get()
+
+    assert outcome["fixed"] == ["total"] and outcome["errors"] == ["date"]
+    db.expire_all()
+    updated = get_result(db, result.id)
+    assert updated.extracted_fields["date"] == "5 March"
+    assert updated.errors == ["date: Invalid date format"]
+    stats = get_job_stats(db, job.id)
+    assert stats["documents_with_errors"] == 1
+    assert stats["fields"]["date"]["invalid"] == 1 and stats["fields"]["total"]["invalid"] == 0
+
+
+def test_overlapping_updates_apply_stats_once(db, job, result):
+    validate = CompiledJob(job.id, None, job.prompt, FIELDS).validator.validate
+
+    # Two runs that both started from the same errors deliver the same fix
+    for _ in range(2):
+        update_result_fields(db, result.id, {"total": "1250.00"}, validate)
+
+    stats = get_job_stats(db, job.id)
+    assert stats["fields"]["total"]["invalid"] == 0
+    assert stats["fields"]["date"]["invalid"] == 1
+    assert stats["documents_with_errors"] == 1
+
+
+def test_automatic_reextraction_respects_attempt_limit(db, db_url, job, result, mocker):
+    mocker.patch("app.tasks.settings.reextract_max_attempts", 0)
+    model = _mock_model(mocker, '{"total": "1250.00"}')
+
+    outcome = reextract_fields_task.apply(args=[result.id, db_url], kwargs={"automatic": True}).get()
+
+    assert outcome["skipped"] == "attempt limit reached"
+    model.generate_content.assert_not_called()
+
+
+def test_reextract_prompt_lists_only_failed_fields():
+    compiled = CompiledJob(1, None, "{fields} {text}", FIELDS)
+    prompt = compiled.render_reextract_prompt("doc", {"total": "Must be a valid number"}, {"total": "n/a"})
+    assert '- total: got "n/a" (Must be a valid number)' in prompt
+    assert "vendor" not in prompt and prompt.endswith("doc")
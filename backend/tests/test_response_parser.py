@@ -0,0 +1,42 @@
+from app.response_parser import FieldMatcher, parse_response
+
+FIELDS = ["invoice_number", "vendor_name", "total_amount"]
+
+
+def test_parses_bare_json():
+    parsed = parse_response('{"invoice_number": "INV-1", "vendor_name": "Acme"}', FieldMatcher(FIELDS))
+    assert parsed.fields == {"invoice_number": "INV-1", "vendor_name": "Acme"}
+    assert parsed.sources == {"invoice_number": "json", "vendor_name": "json", "total_amount": "missing"}
+
+
+def test_parses_fenced_json_with_prose():
+    response = 'Here you go:\n```json\n[{"Invoice Number": "INV-2", "total_amount": 10}]\n```\nThanks!'
+    parsed = parse_response(response, FieldMatcher(FIELDS))
+    assert parsed.fields == {"invoice_number": "INV-2", "total_amount": 10}
+    assert parsed.sources["invoice_number"] == "embedded_json"
+
+
+def test_key_value_fallback():
+    response = "- **Invoice Number**: INV-3\nVendor name = \"Globex\"\nThe total amount is: 1,200.00"
+    parsed = parse_response(response, FieldMatcher(FIELDS))
+    assert parsed.fields == {"invoice_number": "INV-3", "vendor_name": "Globex", "total_amount": "1,200.00"}
+    assert set(parsed.sources.values()) == {"key_value"}
+
+
+def test_default_when_nothing_recovered():
+    parsed = parse_response("I could not read this document.", FieldMatcher(FIELDS))
+    assert parsed.fields == {f: "N/A" for f in FIELDS}
+    assert set(parsed.sources.values()) == {"default"}
+
+
+def test_truncated_json_falls_back_to_key_value():
+    response = ('```json\n{"vendor_name": "Acme", "total_amount": "1250.00", '
+                '"line_items": [{"sku": "A1", "qty": 2}, {"sku"')
+    parsed = parse_response(response, FieldMatcher(FIELDS))
+    assert parsed.fields == {"vendor_name": "Acme", "total_amount": "1250.00"}
+    assert parsed.sources["vendor_name"] == "key_value"
+
+
+def test_key_value_strips_trailing_brackets():
+    parsed = parse_response('Here you go: {"vendor_name": "Acme", "total_amount": 12.5,}', FieldMatcher(FIELDS))
+    assert parsed.fields == {"vendor_name": "Acme", "total_amount": "12.5"}
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import init_db
+from app.crud import get_task_history
+from app.models import TaskLog
+from app.retention import run_retention
+
+
+def test_retention_and_history(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    init_db(engine)
+    db = sessionmaker(bind=engine)()
+
+    now = datetime.now(timezone.utc)
+    old, recent = now - timedelta(days=200), now - timedelta(days=30)
+    for task_id, start in (("old", old), ("recent", recent), ("live", now)):
+        for i, status in enumerate(("waiting", "running", "running", "finished")):
+            db.add(TaskLog(task_id=task_id, status=status, timestamp=start + timedelta(seconds=i)))
+    db.commit()
+
+    summary = run_retention(engine, retention_days=90, compact_after_days=7)
+
+    assert summary["rows_deleted"] == 4
+    assert summary["rows_compacted"] == 3
+    assert get_task_history(db, "old") == []
+    assert [log.status for log in get_task_history(db, "recent")] == ["finished"]
+    assert [log.status for log in get_task_history(db, "live")] == ["waiting", "running", "running", "finished"]
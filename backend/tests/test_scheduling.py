@@ -0,0 +1,60 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs it to run the Lua scripts
+
+from app.core.config import settings
+from app.scheduling import BULK, INTERACTIVE, FairScheduler
+
+
+@pytest.fixture
+def scheduler(mocker):
+    sent = []
+    mocker.patch(
+        "app.scheduling.celery_app.send_task",
+        side_effect=lambda name, args, kwargs, task_id: sent.append((kwargs["tenant"], task_id)),
+    )
+    s = FairScheduler(fakeredis.FakeRedis())
+    s.sent = sent
+    return s
+
+
+def test_round_robin_and_priority(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_tenant_concurrency", 10)
+    for _ in range(3):
+        scheduler.enqueue("member:a", "t", [], priority=BULK)
+    scheduler.enqueue("member:b", "t", [], priority=BULK)
+    scheduler.enqueue("member:c", "t", [], priority=INTERACTIVE)
+
+    assert scheduler.dispatch() == 5
+    assert [tenant for tenant, _ in scheduler.sent] == ["member:c", "member:a", "member:b", "member:a", "member:a"]
+    assert scheduler.stats()["member:a"]["dispatched"] == 3
+
+
+def test_concurrency_cap_and_release(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_tenant_concurrency", 1)
+    first = scheduler.enqueue("member:a", "t", [])
+    scheduler.enqueue("member:a", "t", [])
+
+    assert scheduler.dispatch() == 1
+    assert scheduler.dispatch() == 0
+    scheduler.release("member:a", first)
+    assert scheduler.dispatch() == 1
+
+
+def test_failed_send_requeues_and_frees_slot(scheduler, mocker, monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_tenant_concurrency", 1)
+    task_id = scheduler.enqueue("member:a", "t", [])
+    mocker.patch("app.scheduling.celery_app.send_task", side_effect=ConnectionError("broker down"))
+
+    with pytest.raises(ConnectionError):
+        scheduler.dispatch()
+    assert scheduler.stats()["member:a"]["queued"][INTERACTIVE] == 1
+    assert scheduler.stats()["member:a"]["running"] == 0
+
+    mocker.patch(
+        "app.scheduling.celery_app.send_task",
+        side_effect=lambda name, args, kwargs, task_id: scheduler.sent.append((kwargs["tenant"], task_id)),
+    )
+    assert scheduler.dispatch() == 1
+    assert scheduler.sent == [("member:a", task_id)]
@@ -0,0 +1,71 @@
+import pytest
+
+from app.models import PDF, Result
+from app.search import index_document, parse_filter, parse_number, search_documents
+
+FIELDS = {"vendor": {}, "total": {"type": "float"}, "date": {"type": "date"}}
+
+
+@pytest.fixture
+def jobs(make_job):
+    return make_job(FIELDS), make_job(FIELDS, title="Other")
+
+
+def _index(db, job, text, fields):
+    pdf = PDF(job_id=job.id, file_path="x.pdf")
+    db.add(pdf)
+    db.commit()
+    result = Result(job_id=job.id, pdf_id=pdf.id, extracted_fields=fields, errors=[])
+    db.add(result)
+    db.commit()
+    index_document(db, result, text, FIELDS)
+    return result
+
+
+def test_full_text_and_field_filters(db, jobs):
+    invoices, other = jobs
+    big = _index(db, invoices, "Invoice from Acme Corp for consulting", {"vendor": "Acme Corp", "total": "$12,400.00"})
+    small = _index(db, invoices, "Invoice from Acme Corp for paper", {"vendor": "Acme Corp", "total": "90"})
+    _index(db, other, "Acme Corp memo", {"vendor": "Acme Corp", "total": "50000"})
+
+    hits = search_documents(db, q="acme", job_ids=[invoices.id])["results"]
+    assert {h["result_id"] for h in hits} == {big.id, small.id}
+
+    hits = search_documents(db, q="acme", job_ids=[invoices.id], filters=["total:gt:10000"])["results"]
+    assert [h["result_id"] for h in hits] == [big.id]
+
+    hits = search_documents(db, filters=["vendor:acme corp", "total:lte:100"])["results"]
+    assert [h["result_id"] for h in hits] == [small.id]
+
+    assert search_documents(db, q="consulting")["results"][0]["result_id"] == big.id
+
+
+def test_pagination_and_reindex(db, jobs):
+    invoices, _ = jobs
+    results = [_index(db, invoices, f"invoice number {i}", {"total": str(i)}) for i in range(3)]
+
+    page = search_documents(db, q="invoice", limit=2)
+    assert len(page["results"]) == 2 and page["has_more"]
+    assert not search_documents(db, q="invoice", limit=2, offset=2)["has_more"]
+
+    # Refreshing the fields keeps the stored text searchable
+    results[0].extracted_fields = {"total": "999"}
+    db.commit()
+    index_document(db, results[0], None, FIELDS)
+    hits = search_documents(db, q="invoice", filters=["total:gte:999"])["results"]
+    assert [h["result_id"] for h in hits] == [results[0].id]
+
+
+def test_parsing_helpers():
+    assert parse_number("$ 12,400.50 USD") == 12400.5
+    assert parse_number("n/a") is None
+    assert parse_filter("vendor:acme") == ("vendor", "eq", "acme")
+    assert parse_filter("note:contains:a:b") == ("note", "contains", "a:b")
+    with pytest.raises(ValueError):
+        parse_filter("total:between:1")
+
+
+def test_identifiers_are_not_negative_numbers():
+    assert parse_number("INV-1001") is None
+    assert parse_number("-5") == -5.0
+    assert parse_number("USD -12.5") == -12.5
@@ -0,0 +1,26 @@
+import io
+import os
+from app.storage import LocalStorage
+
+
+def test_content_addressed_and_deduplicated(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    first = storage.save(io.BytesIO(b"%PDF-1.4 same bytes"))
+    second = storage.save(io.BytesIO(b"%PDF-1.4 same bytes"))
+    other = storage.save(io.BytesIO(b"%PDF-1.4 other bytes"))
+
+    assert first.created and not second.created
+    assert first.key == second.key != other.key
+    assert first.path == os.path.join(str(tmp_path), "objects", first.key[:2], first.key[2:4], first.key)
+    with storage.open(first.key) as f:
+        assert f.read() == b"%PDF-1.4 same bytes"
+    assert os.listdir(tmp_path / "tmp") == []
+
+
+def test_accel_redirect_path(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/protected-uploads")
+    stored = storage.save(io.BytesIO(b"data"))
+    assert storage.accel_redirect_path(stored.path) == (
+        f"/protected-uploads/objects/{stored.key[:2]}/{stored.key[2:4]}/{stored.key}"
+    )
+    assert storage.accel_redirect_path("/etc/passwd") is None